@@ -0,0 +1,217 @@
+"""A local stand-in for the Ollama HTTP API, for benchmarks and UI testing without a GPU.
+
+Serves ``/api/tags``, ``/api/ps`` and ``/api/generate`` (streaming and not)
+for ``models`` fake models named ``mock-0``, ``mock-1``, ... Each generation
+emits ``tokens`` tokens at ``token_rate`` tokens/s, a model's first request
+waits ``load_delay`` seconds to simulate loading it, and a request fails with
+probability ``error_rate``. Final responses carry the same timing fields and
+``context`` as a real server. Randomness is seeded, so runs are repeatable.
+
+Run it standalone to point the apps at it::
+
+    python benchmarks/mock_ollama.py --port 11434 --token-rate 50 --load-delay 2
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockConfig:
+    def __init__(self, models=64, tokens=32, token_rate=200.0, load_delay=0.0, error_rate=0.0, model_size=1024 ** 3, seed=0):
+        self.models = models
+        self.tokens = tokens
+        self.token_rate = token_rate
+        self.load_delay = load_delay
+        self.error_rate = error_rate
+        self.model_size = model_size
+        self.seed = seed
+
+    def model_names(self):
+        return [f"mock-{i}" for i in range(self.models)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, obj, status=200):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, obj):
+        data = (json.dumps(obj) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        mock = self.server.mock
+        if self.path == "/api/tags":
+            self._send_json({"models": [mock.tag(name) for name in mock.config.model_names()]})
+        elif self.path == "/api/ps":
+            self._send_json({"models": [mock.tag(name) for name in mock.loaded_models()]})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        try:
+            self._generate()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled or hit its deadline mid-response.
+            self.close_connection = True
+
+    def _generate(self):
+        mock = self.server.mock
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/api/generate":
+            self._send_json({"error": "not found"}, 404)
+            return
+        model = body.get("model")
+        if model not in mock.config.model_names():
+            self._send_json({"error": f"model '{model}' not found"}, 404)
+            return
+
+        start = time.perf_counter()
+        load_seconds = mock.load(model, body.get("keep_alive"))
+        if "prompt" not in body:
+            self._send_json({"model": model, "response": "", "done": True, "done_reason": "load"})
+            return
+        if mock.should_fail():
+            self._send_json({"error": "simulated failure"}, 500)
+            return
+
+        prompt = body["prompt"]
+        tokens = [f"tok{i} " for i in range(mock.config.tokens)]
+        eval_start = time.perf_counter()
+        final = {"model": model, "done": True, "done_reason": "stop"}
+        if body.get("stream", True):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for token in tokens:
+                mock.wait_token()
+                self._send_chunk({"model": model, "response": token, "done": False})
+            final["response"] = ""
+        else:
+            for _ in tokens:
+                mock.wait_token()
+            final["response"] = "".join(tokens)
+        eval_seconds = time.perf_counter() - eval_start
+        final.update({
+            "total_duration": int((time.perf_counter() - start) * 1e9),
+            "load_duration": int(load_seconds * 1e9),
+            "prompt_eval_count": len(prompt.split()),
+            "prompt_eval_duration": 1000000,
+            "eval_count": len(tokens),
+            "eval_duration": int(eval_seconds * 1e9),
+            "context": list(range(len(prompt.split()) + len(tokens))),
+        })
+        if body.get("stream", True):
+            self._send_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self._send_json(final)
+
+
+class MockOllama:
+    """``start()`` serves on a free local port and returns its base URL."""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or MockConfig()
+        self.requests = 0
+        self._random = random.Random(self.config.seed)
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-ollama", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def tag(self, name):
+        return {
+            "name": name,
+            "model": name,
+            "size": self.config.model_size,
+            "size_vram": self.config.model_size,
+            "digest": f"sha256:{name}",
+            "details": {"family": "mock", "parameter_size": "1B", "quantization_level": "Q4_0"},
+        }
+
+    def loaded_models(self):
+        with self._lock:
+            return list(self._loaded)
+
+    def load(self, model, keep_alive=None):
+        """Simulate loading ``model``; returns the seconds spent."""
+        with self._lock:
+            self.requests += 1
+            if keep_alive == 0:
+                self._loaded.pop(model, None)
+                return 0
+            cold = model not in self._loaded
+            self._loaded[model] = time.time()
+        if cold and self.config.load_delay:
+            time.sleep(self.config.load_delay)
+            return self.config.load_delay
+        return 0
+
+    def should_fail(self):
+        with self._lock:
+            return self._random.random() < self.config.error_rate
+
+    def wait_token(self):
+        if self.config.token_rate:
+            time.sleep(1 / self.config.token_rate)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a mock Ollama API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--models", type=int, default=8)
+    parser.add_argument("--tokens", type=int, default=64, help="tokens per response")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="tokens per second per request (0 = no delay)")
+    parser.add_argument("--load-delay", type=float, default=0.0, help="seconds to 'load' a model on first use")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    config = MockConfig(
+        models=args.models, tokens=args.tokens, token_rate=args.token_rate,
+        load_delay=args.load_delay, error_rate=args.error_rate, seed=args.seed,
+    )
+    mock = MockOllama(config, args.host, args.port)
+    print(f"Mock Ollama serving {args.models} models on {mock.url}")
+    try:
+        mock._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
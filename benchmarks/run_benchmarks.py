@@ -0,0 +1,275 @@
+"""Measure the app's own overhead, with model speed taken out by a mock Ollama server.
+
+Scenarios:
+
+- ``fan_out_<n>``: one prompt dispatched to ``n`` models through
+  ``DispatchEngine`` (``query_ollama_model`` on the shared event loop) against
+  ``mock_ollama``. ``overhead_p50_s`` is the median run latency minus the time
+  the mock needs to emit the tokens, i.e. what the engine adds.
+- ``history``: ``--history-entries`` runs appended to a fresh ``HistoryStore``,
+  then random history pages read back the way the apps page through them,
+  then full-text searches filtered by model and tokens/s, and leaderboards.
+
+Each scenario reports p50/p95 latency in seconds, throughput and the peak
+Python memory (``tracemalloc``, measured in a separate pass so it doesn't slow
+the timed runs). Results are compared with ``benchmarks/baseline.json``: a
+latency or memory figure more than ``--tolerance`` (default 25%) above the
+baseline, or a throughput figure that far below it, is reported as a
+regression and the exit code is 1. ``--update-baseline`` rewrites the file.
+The mock runs in the same process, so the numbers are for comparing commits
+on one machine, not across machines.
+
+Usage::
+
+    python benchmarks/run_benchmarks.py            # full suite (1-64 models, 10k history entries)
+    python benchmarks/run_benchmarks.py --quick    # smaller sizes for a quick check
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_runner import backends  # noqa: E402
+from llm_runner import dispatch_engine  # noqa: E402
+from llm_runner import history_store  # noqa: E402
+from mock_ollama import MockConfig, MockOllama  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Differences smaller than this are timer or allocator noise, whatever the percentage.
+NOISE_FLOOR = {"_s": 0.005, "_mb": 0.5}
+PROMPT = "Explain the difference between a process and a thread in two sentences."
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_memory_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+    finally:
+        tracemalloc.stop()
+
+
+def bench_fan_out(config, model_counts, repeats, stream):
+    mock = MockOllama(config)
+    backends.configure([mock.start()], "least_outstanding")
+    ideal = config.tokens / config.token_rate if config.token_rate else 0
+    results = {}
+    try:
+        for count in model_counts:
+            models = config.model_names()[:count]
+            engine = dispatch_engine.DispatchEngine(max_concurrency=count)
+            engine.preload(models).result()
+
+            def run_once():
+                return engine.run(PROMPT, models, stream=stream, policy="parallel")
+
+            latencies = []
+            errors = 0
+            started = time.perf_counter()
+            for _ in range(repeats):
+                run_started = time.perf_counter()
+                responses = run_once()
+                latencies.append(time.perf_counter() - run_started)
+                errors += sum(1 for res in responses.values() if res["response"].startswith("Error:"))
+            elapsed = time.perf_counter() - started
+            p50 = percentile(latencies, 50)
+            results[f"fan_out_{count}"] = {
+                "p50_s": round(p50, 4),
+                "p95_s": round(percentile(latencies, 95), 4),
+                "overhead_p50_s": round(max(0.0, p50 - ideal), 4),
+                "requests_per_s": round(count * repeats / elapsed, 2),
+                "tokens_per_s": round(count * repeats * config.tokens / elapsed, 1),
+                "peak_memory_mb": peak_memory_mb(run_once),
+                "errors": errors,
+            }
+            engine.shutdown()
+    finally:
+        mock.stop()
+    return results
+
+
+def _history_response(model, words):
+    return {
+        "model": model,
+        "duration": 1.23,
+        "ttft": 0.12,
+        "eval_count": words,
+        "eval_rate": 42.0,
+        "response": " ".join(f"word{i}" for i in range(words)),
+    }
+
+
+def bench_history(entries, models_per_entry, page_size=10, page_reads=200, words=150):
+    responses = [_history_response(f"mock-{i}", words) for i in range(models_per_entry)]
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = history_store.HistoryStore(os.path.join(tmp, "history.db"))
+        try:
+            append_latencies = []
+            started = time.perf_counter()
+            for i in range(entries):
+                append_started = time.perf_counter()
+                store.append(f"prompt {i}", responses)
+                append_latencies.append(time.perf_counter() - append_started)
+            append_elapsed = time.perf_counter() - started
+
+            offsets = [rng.randrange(0, max(1, entries - page_size)) for _ in range(page_reads)]
+
+            def read_pages():
+                for offset in offsets:
+                    store.count()
+                    store.entries(limit=page_size, offset=offset, newest_first=True)
+
+            page_latencies = []
+            for offset in offsets:
+                page_started = time.perf_counter()
+                store.count()
+                store.entries(limit=page_size, offset=offset, newest_first=True)
+                page_latencies.append(time.perf_counter() - page_started)
+
+            search_latencies = []
+            for _ in range(page_reads):
+                search_started = time.perf_counter()
+                store.search(f"word{rng.randrange(words)}", models=[f"mock-{rng.randrange(models_per_entry)}"], min_eval_rate=10, limit=page_size)
+                search_latencies.append(time.perf_counter() - search_started)
+            leaderboard_latencies = []
+            for _ in range(page_reads):
+                leaderboard_started = time.perf_counter()
+                store.leaderboard()
+                leaderboard_latencies.append(time.perf_counter() - leaderboard_started)
+
+            result = {
+                "append_p50_s": round(percentile(append_latencies, 50), 5),
+                "append_p95_s": round(percentile(append_latencies, 95), 5),
+                "appends_per_s": round(entries / append_elapsed, 1),
+                "page_read_p50_s": round(percentile(page_latencies, 50), 5),
+                "page_read_p95_s": round(percentile(page_latencies, 95), 5),
+                "page_read_peak_memory_mb": peak_memory_mb(read_pages),
+                "search_p50_s": round(percentile(search_latencies, 50), 5),
+                "search_p95_s": round(percentile(search_latencies, 95), 5),
+                "leaderboard_p50_s": round(percentile(leaderboard_latencies, 50), 5),
+                "db_size_mb": round(os.path.getsize(store.path) / (1024 * 1024), 2),
+            }
+        finally:
+            store.close()
+    return {"history": result}
+
+
+def noise_floor(metric):
+    return next((floor for suffix, floor in NOISE_FLOOR.items() if metric.endswith(suffix)), 0)
+
+
+def lower_is_better(metric):
+    if metric.endswith("_per_s"):
+        return False
+    if metric.endswith("_s") or metric.endswith("_mb"):
+        return True
+    return None
+
+
+def compare(results, baseline, tolerance):
+    """Human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            expected = baseline.get(scenario, {}).get(metric)
+            lower = lower_is_better(metric)
+            if expected is None or lower is None or not expected:
+                continue
+            if lower and value > expected * (1 + tolerance) and value - expected > noise_floor(metric):
+                regressions.append(f"{scenario}.{metric}: {value} vs baseline {expected} (+{value / expected - 1:.0%})")
+            elif not lower and value < expected * (1 - tolerance):
+                regressions.append(f"{scenario}.{metric}: {value} vs baseline {expected} ({value / expected - 1:.0%})")
+    return regressions
+
+
+def print_report(results):
+    for scenario, metrics in results.items():
+        print(scenario)
+        for metric, value in metrics.items():
+            print(f"  {metric:<26} {value}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dispatch engine and history store against a mock Ollama.")
+    parser.add_argument("--quick", action="store_true", help="1/4/16 models and 1000 history entries")
+    parser.add_argument("--models", type=int, nargs="+", default=None, help="model counts to fan out to (default 1 4 16 64)")
+    parser.add_argument("--repeats", type=int, default=10, help="runs per model count")
+    parser.add_argument("--tokens", type=int, default=32, help="tokens per mock response")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="mock tokens per second per request")
+    parser.add_argument("--load-delay", type=float, default=0.0, help="mock model load time in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of mock requests that fail")
+    parser.add_argument("--no-stream", action="store_true", help="request whole responses instead of streaming")
+    parser.add_argument("--history-entries", type=int, default=None, help="history entries to append (default 10000)")
+    parser.add_argument("--history-models", type=int, default=4, help="responses per history entry")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative change before flagging (default 0.25)")
+    parser.add_argument("--update-baseline", action="store_true", help="write these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    model_counts = args.models or ([1, 4, 16] if args.quick else [1, 4, 16, 64])
+    history_entries = args.history_entries or (1000 if args.quick else 10000)
+    config = MockConfig(
+        models=max(model_counts), tokens=args.tokens, token_rate=args.token_rate,
+        load_delay=args.load_delay, error_rate=args.error_rate,
+    )
+
+    results = {}
+    results.update(bench_fan_out(config, model_counts, args.repeats, stream=not args.no_stream))
+    results.update(bench_history(history_entries, args.history_models))
+    print_report(results)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "models": model_counts, "repeats": args.repeats, "tokens": args.tokens,
+            "token_rate": args.token_rate, "load_delay": args.load_delay, "error_rate": args.error_rate,
+            "stream": not args.no_stream, "history_entries": history_entries, "history_models": args.history_models,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --update-baseline to create one.")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != report["settings"]:
+        print("Note: baseline was recorded with different settings; comparing the scenarios both have.")
+    regressions = compare(results, baseline.get("results", {}), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print("No regressions against the baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""Shared engine behind both Streamlit views and the headless tools.
+
+The engine modules (``dispatch_engine``, ``scheduler``, ``backends``,
+``ollama_client``, ``model_catalog``, ``history_store``, ``response_cache``,
+``metrics``, ``reasoning``, ``prompt_matrix``, ``telemetry`` and
+``batch_runner``) don't import Streamlit, so ``batch_runner`` and the
+benchmarks start without it. The UI lives in ``llm_runner.ui`` and the two page
+layouts in ``llm_runner.layouts``; only those import Streamlit.
+"""
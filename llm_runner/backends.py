@@ -0,0 +1,201 @@
+"""Registry of Ollama hosts that one comparison can be spread across.
+
+Hosts come from ``OLLAMA_HOSTS`` (comma-separated base URLs) and default to
+the single ``OLLAMA_BASE_URL``. Each host's ``/api/tags`` and ``/api/ps`` are
+polled as a health check at most every ``OLLAMA_HEALTH_INTERVAL`` seconds
+(default 30). ``choose`` picks the host for a model request with the
+``OLLAMA_ROUTING`` policy:
+
+- ``residency`` (default): a healthy host that already has the model loaded,
+  otherwise the healthy host with the fewest requests in flight.
+- ``least_outstanding``: the healthy host with the fewest requests in flight.
+- ``health``: the first healthy host in ``OLLAMA_HOSTS`` order (priority failover).
+
+Only hosts that have the model pulled are considered. A host that refuses a
+connection is marked unhealthy and the engine retries on the next one.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+from . import ollama_client
+
+ROUTING_POLICIES = ("residency", "least_outstanding", "health")
+ROUTING = os.environ.get("OLLAMA_ROUTING", "residency")
+HEALTH_INTERVAL = float(os.environ.get("OLLAMA_HEALTH_INTERVAL", "30"))
+
+
+class NoBackendAvailable(RuntimeError):
+    pass
+
+
+class Backend:
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.healthy = True
+        self.error = None
+        self.checked_at = 0
+        self.models = {}
+        self.loaded = {}
+        self.outstanding = 0
+
+    def has_model(self, model_name):
+        # Before the first successful check we don't know, so let it try.
+        return not self.checked_at or model_name in self.models
+
+
+class BackendRegistry:
+    def __init__(self, urls, routing=ROUTING, health_interval=HEALTH_INTERVAL):
+        if routing not in ROUTING_POLICIES:
+            raise ValueError(f"Unknown routing policy: {routing}")
+        self.backends = [Backend(url) for url in dict.fromkeys(urls)]
+        self.routing = routing
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._refresh_task = None
+        self._refresh_thread = None
+
+    def _update(self, backend, tags=None, ps=None, error=None):
+        with self._lock:
+            backend.checked_at = time.time()
+            if error is not None:
+                backend.healthy = False
+                backend.error = str(error)
+                return
+            backend.healthy = True
+            backend.error = None
+            backend.models = {m["name"]: m for m in tags.get("models", [])}
+            backend.loaded = {m["name"]: m for m in ps.get("models", [])}
+
+    def refresh(self):
+        """Health-check every host now (blocking)."""
+        for backend in self.backends:
+            try:
+                tags = ollama_client.get("/api/tags", base_url=backend.url).json()
+                ps = ollama_client.get("/api/ps", base_url=backend.url).json()
+            except Exception as e:
+                self._update(backend, error=e)
+            else:
+                self._update(backend, tags, ps)
+
+    def refresh_in_background(self):
+        """Run ``refresh`` on a worker thread unless one is already running."""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self.refresh, name="backend-health", daemon=True)
+            self._refresh_thread.start()
+
+    async def _arefresh_one(self, client, backend):
+        try:
+            tags = await client.get(f"{backend.url}/api/tags")
+            ps = await client.get(f"{backend.url}/api/ps")
+            tags.raise_for_status()
+            ps.raise_for_status()
+        except Exception as e:
+            self._update(backend, error=e)
+        else:
+            self._update(backend, tags.json(), ps.json())
+
+    async def ensure_fresh(self, client):
+        """Refresh stale hosts from the engine's event loop, sharing one refresh between concurrent callers."""
+        if not self.stale():
+            return
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(
+                asyncio.gather(*(self._arefresh_one(client, backend) for backend in self.backends))
+            )
+        await asyncio.shield(self._refresh_task)
+
+    def stale(self):
+        now = time.time()
+        return any(now - backend.checked_at > self.health_interval for backend in self.backends)
+
+    def mark_failed(self, backend, error):
+        self._update(backend, error=error)
+
+    def choose(self, model_name, exclude=()):
+        with self._lock:
+            candidates = [b for b in self.backends if b not in exclude and b.has_model(model_name)]
+            healthy = [b for b in candidates if b.healthy]
+            # If every host looks down, try them anyway: the health data may be stale.
+            candidates = healthy or candidates
+            if not candidates:
+                down = [b.url for b in self.backends if not b.healthy]
+                reason = f" (unreachable: {', '.join(down)})" if down else ""
+                raise NoBackendAvailable(f"No Ollama host has {model_name}{reason}")
+            if self.routing == "health":
+                return candidates[0]
+            if self.routing == "least_outstanding":
+                return min(candidates, key=lambda b: b.outstanding)
+            return min(candidates, key=lambda b: (model_name not in b.loaded, b.outstanding))
+
+    def hosts_with(self, model_name):
+        """Healthy hosts that have ``model_name`` pulled, loaded or not."""
+        with self._lock:
+            return [b for b in self.backends if b.healthy and b.has_model(model_name)]
+
+    def healthy(self):
+        with self._lock:
+            return [b for b in self.backends if b.healthy and b.checked_at]
+
+    def all_models(self):
+        """``/api/tags`` entries merged across healthy hosts, first host wins on duplicates."""
+        merged = {}
+        with self._lock:
+            for backend in self.backends:
+                if backend.healthy:
+                    for name, tag in backend.models.items():
+                        merged.setdefault(name, tag)
+        return merged
+
+    def loaded_models(self):
+        with self._lock:
+            return [{**m, "host": b.url} for b in self.backends if b.healthy for m in b.loaded.values()]
+
+    def state(self):
+        """Residency, sizes and digests across the pool, in the shape ``scheduler.plan`` expects."""
+        tags = self.all_models()
+        resident = {m["name"]: m.get("size", 0) for m in self.loaded_models()}
+        sizes = {name: tag.get("size", 0) for name, tag in tags.items()}
+        sizes.update(resident)
+        digests = {name: tag.get("digest") for name, tag in tags.items() if tag.get("digest")}
+        return {"resident": resident, "sizes": sizes, "digests": digests}
+
+    def status(self):
+        with self._lock:
+            return [
+                {
+                    "host": b.url,
+                    "healthy": b.healthy,
+                    "models": len(b.models),
+                    "loaded": ", ".join(b.loaded),
+                    "in_flight": b.outstanding,
+                    "error": b.error or "",
+                }
+                for b in self.backends
+            ]
+
+
+def configured_hosts():
+    return list(ollama_client.HOSTS)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = BackendRegistry(configured_hosts())
+        return _registry
+
+
+def configure(hosts, routing=None):
+    global _registry
+    with _registry_lock:
+        _registry = BackendRegistry(hosts, routing or ROUTING)
@@ -0,0 +1,172 @@
+"""Run a file of prompts against several models without the Streamlit UI.
+
+Usage::
+
+    python -m llm_runner.batch_runner prompts.jsonl --models llama3.2 qwen3:8b --output results.jsonl
+
+Each line of the prompt file is a JSON object with a ``prompt`` and an
+optional ``id`` (the line number is used otherwise). Every (prompt, model)
+pair is dispatched through the same engine as the apps, and each result is
+appended to the output file (JSONL, or CSV if the name ends in ``.csv``) as
+soon as it finishes. Re-running the same command resumes: pairs that already
+have a successful row in the output file are skipped, failed ones are retried.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import csv
+import json
+import os
+import sys
+import time
+
+from . import dispatch_engine
+from . import metrics
+from . import scheduler
+
+CSV_FIELDS = ["prompt_id", "model", *metrics.METRIC_FIELDS, "cached", "finished_at", "prompt", "response", "reasoning"]
+
+
+def load_prompts(path):
+    prompts = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"prompt": item}
+            prompts.append({"id": str(item.get("id", line_number)), "prompt": item["prompt"]})
+    return prompts
+
+
+def is_error(row):
+    return str(row.get("response", "")).startswith("Error:")
+
+
+def completed_pairs(output_path):
+    """(prompt_id, model) pairs that already have a successful row in the output file."""
+    if not os.path.exists(output_path):
+        return set()
+    done = set()
+    with open(output_path, "r", encoding="utf-8", newline="") as f:
+        if output_path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = []
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A crash mid-write can leave a truncated last line.
+                    continue
+        for row in rows:
+            if row.get("prompt_id") is not None and row.get("model") and not is_error(row):
+                done.add((str(row["prompt_id"]), row["model"]))
+    return done
+
+
+class ResultWriter:
+    def __init__(self, output_path):
+        self.is_csv = output_path.endswith(".csv")
+        new_file = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+        self._file = open(output_path, "a", encoding="utf-8", newline="")
+        if self.is_csv:
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if new_file:
+                self._csv.writeheader()
+
+    def write(self, row):
+        if self.is_csv:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def run_batch(prompts, models, output_path, concurrency=4, policy=None, options=None, use_cache=False, deadline=None, engine=None, log=None):
+    """Run every (prompt, model) pair not already in ``output_path``; returns a summary dict."""
+    done = completed_pairs(output_path)
+    todo = collections.deque()
+    for item in prompts:
+        remaining = [model for model in models if (item["id"], model) not in done]
+        if remaining:
+            todo.append((item, remaining))
+    total = sum(len(remaining) for _, remaining in todo)
+    summary = {"skipped": len(prompts) * len(models) - total, "completed": 0, "failed": 0}
+
+    own_engine = engine is None
+    if own_engine:
+        engine = dispatch_engine.DispatchEngine(max_concurrency=concurrency)
+    writer = ResultWriter(output_path)
+    in_flight = []
+    try:
+        while todo or in_flight:
+            while todo and len(in_flight) < concurrency:
+                item, remaining = todo.popleft()
+                run = engine.submit(
+                    item["prompt"], remaining, stream=False, deadline=deadline,
+                    policy=policy, options=options, use_cache=use_cache
+                )
+                in_flight.append((item, run, set()))
+
+            waiting = [run.futures[model] for _, run, written in in_flight for model in run.models if model not in written]
+            concurrent.futures.wait(waiting, timeout=1, return_when=concurrent.futures.FIRST_COMPLETED)
+
+            for item, run, written in in_flight:
+                for model in run.models:
+                    if model in written or not run.done(model):
+                        continue
+                    result = run.result(model)
+                    writer.write({"prompt_id": item["id"], "prompt": item["prompt"], **result, "finished_at": time.time()})
+                    written.add(model)
+                    summary["failed" if is_error(result) else "completed"] += 1
+                    if log:
+                        finished = summary["completed"] + summary["failed"]
+                        log(f"[{finished}/{total}] {item['id']} {model}: {result['duration']}s {result['response'][:60]!r}")
+            in_flight = [entry for entry in in_flight if len(entry[2]) < len(entry[1].models)]
+    finally:
+        writer.close()
+        for _, run, _ in in_flight:
+            run.cancel()
+        if own_engine:
+            engine.shutdown()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts against several Ollama models.")
+    parser.add_argument("prompts", help="JSONL file with one {\"id\": ..., \"prompt\": ...} object per line")
+    parser.add_argument("--models", nargs="+", required=True, help="model names to compare")
+    parser.add_argument("--output", required=True, help="results file (.jsonl or .csv); existing rows are resumed")
+    parser.add_argument("--concurrency", type=int, default=4, help="max requests and prompts in flight (default 4)")
+    parser.add_argument("--policy", choices=scheduler.POLICIES, default=None, help="scheduler policy")
+    parser.add_argument("--deadline", type=float, default=None, help="per-model deadline in seconds")
+    parser.add_argument("--temperature", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--use-cache", action="store_true", help="use the response cache for deterministic options")
+    args = parser.parse_args(argv)
+
+    options = {}
+    if args.temperature is not None:
+        options["temperature"] = args.temperature
+    if args.seed is not None:
+        options["seed"] = args.seed
+
+    summary = run_batch(
+        load_prompts(args.prompts), args.models, args.output,
+        concurrency=args.concurrency, policy=args.policy, options=options or None,
+        use_cache=args.use_cache, deadline=args.deadline,
+        log=lambda line: print(line, file=sys.stderr),
+    )
+    print(f"completed={summary['completed']} failed={summary['failed']} skipped={summary['skipped']}")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
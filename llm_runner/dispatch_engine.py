@@ -0,0 +1,688 @@
+"""asyncio fan-out engine shared by both app views.
+
+One event loop runs in a background thread for the whole process and every
+model request is a task on it, so a comparison of N models costs N tasks
+instead of N OS threads. ``DispatchEngine.submit`` returns a ``Run`` handle
+that the Streamlit script can poll across reruns, cancel per model, and read
+results from, already keyed by model name.
+
+Each request goes to the Ollama host picked by ``backends`` and fails over to
+another host if the chosen one is unreachable. Within a run, models are
+started in the waves planned by ``scheduler.plan`` so models that are already
+loaded go first and Ollama isn't asked to hold more models than fit. With ``use_cache``, deterministic requests are answered
+from ``response_cache`` when the model digest, prompt and options match, and
+only the misses are sent to Ollama. ``<think>`` blocks are split from the
+answer by ``reasoning.ThinkFilter`` as tokens stream in. Each model request is
+traced by ``telemetry``. Transient failures (5xx responses, dropped streams, a
+restarting runner) are retried with jittered exponential backoff, configured
+by ``OLLAMA_RETRIES`` (default 2), ``OLLAMA_RETRY_BACKOFF`` (seconds, 0.5) and
+``OLLAMA_RETRY_MAX_BACKOFF`` (8). The global concurrency cap comes from
+``OLLAMA_MAX_CONCURRENCY`` (default 8).
+
+The engine is one per process (``get_engine``), so every browser session
+shares it. A request for the same model, prompt and options as one already in
+flight, from any session, waits for that one and shares its streamed tokens
+and result instead of generating again (single-flight); the copy is marked
+``coalesced``. Conversation turns and Regenerate never coalesce. Set
+``OLLAMA_COALESCE=0`` to turn this off.
+"""
+
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import os
+import random
+import threading
+import time
+
+import httpx
+
+from . import backends
+from . import metrics
+from . import ollama_client
+from . import reasoning
+from . import response_cache
+from . import scheduler
+from . import telemetry
+
+MAX_CONCURRENCY = int(os.environ.get("OLLAMA_MAX_CONCURRENCY", "8"))
+RETRIES = int(os.environ.get("OLLAMA_RETRIES", "2"))
+RETRY_BACKOFF = float(os.environ.get("OLLAMA_RETRY_BACKOFF", "0.5"))
+RETRY_MAX_BACKOFF = float(os.environ.get("OLLAMA_RETRY_MAX_BACKOFF", "8"))
+RETRY_STATUS = (429, 500, 502, 503, 504)
+COALESCE = os.environ.get("OLLAMA_COALESCE", "1") != "0"
+# Ollama error messages that mean the runner died or is restarting, not that the request is bad.
+TRANSIENT_MESSAGES = ("runner", "unexpectedly", "connection reset", "eof", "try again", "busy")
+
+
+def error_result(model_name, message, duration=0, error_type=None):
+    result = {
+        "model": model_name,
+        "duration": duration,
+        "ttft": None,
+        "eval_count": 0,
+        "eval_rate": 0,
+        "response": f"Error: {message}"
+    }
+    if error_type:
+        result["error_type"] = error_type
+    return result
+
+
+class BackendUnavailable(Exception):
+    """The host could not be reached before any output was produced; safe to retry elsewhere."""
+
+
+class TransientError(Exception):
+    """A failure worth retrying on the same model; carries the original error and how long the attempt took."""
+
+    def __init__(self, error, duration):
+        super().__init__(str(error))
+        self.error = error
+        self.duration = duration
+
+
+class OllamaError(RuntimeError):
+    """An error reported by the server inside a streamed response."""
+
+
+# Connection-level failures that mean the host is down rather than the model failing.
+FAILOVER_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+
+def is_transient(error):
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUS
+    if isinstance(error, (httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError)):
+        return True
+    if isinstance(error, OllamaError):
+        message = str(error).lower()
+        return any(text in message for text in TRANSIENT_MESSAGES)
+    return False
+
+
+def backoff_delay(attempt, base=RETRY_BACKOFF, cap=RETRY_MAX_BACKOFF):
+    """Full-jitter exponential backoff: a random delay up to ``base * 2 ** attempt``, capped."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+async def query_ollama_model(client, model_name, prompt_text, on_token=None, keep_alive=None, options=None, base_url=None, context=None, keep_context=False, span=None):
+    generate_url = ollama_client.url("/api/generate", base_url)
+    ttft = None
+    start_time = time.time()
+    try:
+        stream = on_token is not None
+        payload = {"model": model_name, "prompt": prompt_text, "stream": stream}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        if options:
+            payload["options"] = options
+        if context:
+            # The server resumes from these token ids instead of re-evaluating the earlier turns.
+            payload["context"] = context
+
+        think_filter = reasoning.ThinkFilter()
+        answer = []
+        thoughts = []
+        token_count = None
+        reasoning_tokens = 0
+        ttfat = None
+
+        def emit(segments):
+            nonlocal ttfat
+            for is_reasoning, text in segments:
+                (thoughts if is_reasoning else answer).append(text)
+                if not is_reasoning and ttfat is None and text.strip():
+                    ttfat = round(time.time() - start_time, 2)
+                if stream:
+                    on_token(model_name, text, is_reasoning)
+
+        if stream:
+            token_count = 0
+            response_data = {}
+            async with client.stream("POST", generate_url, json=payload) as res:
+                res.raise_for_status()
+                if span:
+                    span.mark("connected")
+                async for line in res.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise OllamaError(chunk["error"])
+                    # Newer servers can return reasoning in a separate "thinking" field.
+                    thinking = chunk.get("thinking", "")
+                    token = chunk.get("response", "")
+                    if thinking or token:
+                        if ttft is None:
+                            ttft = round(time.time() - start_time, 2)
+                            if span:
+                                span.mark("first_token")
+                        token_count += 1
+                    if thinking:
+                        reasoning_tokens += 1
+                        emit([(True, thinking)])
+                    if token:
+                        segments = think_filter.feed(token)
+                        if think_filter.in_reasoning or any(is_reasoning for is_reasoning, _ in segments):
+                            reasoning_tokens += 1
+                        emit(segments)
+                    if chunk.get("done"):
+                        response_data = chunk
+            emit(think_filter.flush())
+        else:
+            async with client.stream("POST", generate_url, json=payload) as res:
+                res.raise_for_status()
+                headers_at = time.perf_counter()
+                await res.aread()
+            response_data = res.json()
+            if span:
+                # Ollama only sends the headers of a non-streamed response once it is complete,
+                # so generation is placed by the server's own eval_duration instead.
+                generated_at = time.perf_counter()
+                first_token_at = max(span.marks.get("dispatched", 0), generated_at - (response_data.get("eval_duration") or 0) / 1e9)
+                span.mark("connected", min(headers_at, first_token_at))
+                span.mark("first_token", first_token_at)
+                span.mark("generated", generated_at)
+            if response_data.get("thinking"):
+                thoughts.append(response_data["thinking"])
+            emit(think_filter.feed(response_data.get("response", "")) + think_filter.flush())
+            reasoning_tokens = None
+            ttfat = None
+        end_time = time.time()
+        if span:
+            span.mark("generated")
+
+        duration = round(end_time - start_time, 2)
+
+        result = {
+            "model": model_name,
+            **metrics.compute_metrics(response_data, duration, ttft, token_count, ttfat, reasoning_tokens),
+            "response": "".join(answer),
+            "reasoning": "".join(thoughts),
+        }
+        if keep_context:
+            result["context_reused"] = len(context or [])
+            result["context"] = response_data.get("context")
+        return result
+    except Exception as e:
+        if isinstance(e, FAILOVER_ERRORS) and ttft is None:
+            raise BackendUnavailable(e) from e
+        duration = round(time.time() - start_time, 2)
+        if is_transient(e):
+            raise TransientError(e, duration) from e
+        return error_result(model_name, e, duration, type(e).__name__)
+
+
+class Run:
+    """One prompt dispatched to several models; safe to poll from the Streamlit thread."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, prompt, models, stream, plan, options=None, contexts=None):
+        self.run_id = next(Run._ids)
+        self.prompt = prompt
+        self.models = models
+        self.stream = stream
+        self.plan = plan
+        self.options = options
+        # None outside conversation mode; otherwise each model's context from the previous turn.
+        self.contexts = contexts
+        self.current_wave = 0
+        self.started = time.time()
+        self.partial = {model: [] for model in models}
+        self.partial_reasoning = {model: [] for model in models}
+        self.futures = {}
+
+    def _reset(self, model_name):
+        """Drop a model's streamed output before it is re-dispatched."""
+        self.partial[model_name] = []
+        self.partial_reasoning[model_name] = []
+
+    def _push(self, model_name, token, is_reasoning=False):
+        (self.partial_reasoning if is_reasoning else self.partial)[model_name].append(token)
+
+    def text(self, model_name):
+        return "".join(self.partial[model_name])
+
+    def reasoning(self, model_name):
+        return "".join(self.partial_reasoning[model_name])
+
+    def queued(self, model_name):
+        return self.plan.wave_of.get(model_name, 0) > self.current_wave
+
+    def elapsed(self):
+        return round(time.time() - self.started, 2)
+
+    def cancel(self, model_name=None):
+        for name, future in self.futures.items():
+            if model_name is None or name == model_name:
+                future.cancel()
+
+    def done(self, model_name=None):
+        if model_name is not None:
+            return self.futures[model_name].done()
+        return all(future.done() for future in self.futures.values())
+
+    def wait(self, timeout=None):
+        concurrent.futures.wait(list(self.futures.values()), timeout=timeout)
+        return self.done()
+
+    def result(self, model_name):
+        future = self.futures[model_name]
+        if future.cancelled():
+            return error_result(model_name, "cancelled", self.elapsed())
+        try:
+            return future.result()
+        except Exception as exc:
+            return error_result(model_name, exc)
+
+    def results(self):
+        return {model: self.result(model) for model in self.models}
+
+
+class MatrixRun:
+    """Several prompts sent to the same models, at most ``max_prompts`` prompt runs in flight at once.
+
+    A driver thread submits the next prompt as soon as one finishes, so the
+    engine is never idle between prompts. Poll it like a ``Run``, by prompt index.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, engine, prompts, models, max_prompts, submit_kwargs):
+        self.run_id = next(MatrixRun._ids)
+        self.prompts = prompts
+        self.models = list(dict.fromkeys(models))
+        self.max_prompts = max(1, max_prompts)
+        self.runs = [None] * len(prompts)
+        self.started = time.time()
+        self.error = None
+        self._engine = engine
+        self._submit_kwargs = submit_kwargs
+        self._cancelled = False
+        self._thread = threading.Thread(target=self._drive, name=f"matrix-run-{self.run_id}", daemon=True)
+        self._thread.start()
+
+    def _drive(self):
+        next_index = 0
+        try:
+            while True:
+                active = [run for run in self.runs if run is not None and not run.done()]
+                while not self._cancelled and next_index < len(self.prompts) and len(active) < self.max_prompts:
+                    run = self._engine.submit(self.prompts[next_index], self.models, **self._submit_kwargs)
+                    self.runs[next_index] = run
+                    if self._cancelled:
+                        run.cancel()
+                    active.append(run)
+                    next_index += 1
+                if not active and (self._cancelled or next_index >= len(self.prompts)):
+                    return
+                waiting = [future for run in active for future in run.futures.values()]
+                concurrent.futures.wait(waiting, timeout=1, return_when=concurrent.futures.FIRST_COMPLETED)
+        except Exception as e:
+            self.error = str(e)
+            self.cancel()
+
+    def elapsed(self):
+        return round(time.time() - self.started, 2)
+
+    def cancel(self):
+        self._cancelled = True
+        for run in self.runs:
+            if run is not None:
+                run.cancel()
+
+    def done(self):
+        return not self._thread.is_alive()
+
+    def completed(self):
+        return sum(1 for run in self.runs if run is not None and run.done())
+
+    def status(self, index, model_name):
+        run = self.runs[index]
+        if run is None:
+            return "cancelled" if self.done() else "queued"
+        if run.done(model_name):
+            return "done"
+        return "queued" if run.queued(model_name) else "running"
+
+    def result(self, index, model_name):
+        run = self.runs[index]
+        if run is None:
+            return error_result(model_name, self.error or "cancelled")
+        return run.result(model_name)
+
+    def results(self, index):
+        return [self.result(index, model_name) for model_name in self.models]
+
+
+class _Flight:
+    """A model request in flight that identical requests from other runs wait on instead of sending their own.
+
+    It stands in for the leading run when tokens are streamed, so every run
+    that joined sees them.
+    """
+
+    def __init__(self, run, model_name):
+        self.leader = run
+        self.model_name = model_name
+        self.followers = []
+        self.future = asyncio.get_running_loop().create_future()
+
+    def join(self, run):
+        run.partial[self.model_name] = list(self.leader.partial[self.model_name])
+        run.partial_reasoning[self.model_name] = list(self.leader.partial_reasoning[self.model_name])
+        self.followers.append(run)
+
+    def leave(self, run):
+        if run in self.followers:
+            self.followers.remove(run)
+
+    def _push(self, model_name, token, is_reasoning=False):
+        for run in (self.leader, *self.followers):
+            run._push(model_name, token, is_reasoning)
+
+    def _reset(self, model_name):
+        for run in (self.leader, *self.followers):
+            run._reset(model_name)
+
+
+def flight_key(model_name, prompt, options):
+    return (model_name, prompt, json.dumps(options or {}, sort_keys=True))
+
+
+class _WaveGate:
+    """Holds each model's task until every model of the previous wave has finished."""
+
+    def __init__(self, run):
+        self.run = run
+        self.events = [asyncio.Event() for _ in run.plan.waves]
+        self.remaining = [len(wave) for wave in run.plan.waves]
+        if self.events:
+            self.events[0].set()
+
+    async def wait(self, model_name):
+        await self.events[self.run.plan.wave_of[model_name]].wait()
+
+    def finished(self, model_name):
+        wave = self.run.plan.wave_of[model_name]
+        self.remaining[wave] -= 1
+        while wave + 1 < len(self.events) and self.remaining[wave] == 0:
+            wave += 1
+            self.run.current_wave = wave
+            self.events[wave].set()
+
+
+class DispatchEngine:
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, retries=RETRIES, coalesce=COALESCE):
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.coalesce = coalesce
+        # Flight key -> _Flight; only touched on the event loop thread.
+        self._flights = {}
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="dispatch-engine", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    async def _get_client(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._client is None:
+            self._client = ollama_client.make_async_client(self.max_concurrency)
+        return self._client
+
+    async def _dispatch(self, client, run, model_name, span, sink=None):
+        """Send one model request to the best host.
+
+        A host that can't be reached is skipped for the next one; once every
+        host has failed to connect (as while Ollama restarts a runner), or on
+        any other transient failure, the request is retried up to
+        ``self.retries`` times after a jittered backoff.
+        Streamed tokens go to ``sink`` (the run, or the ``_Flight`` it leads).
+        """
+        sink = sink or run
+        registry = backends.get_registry()
+        await registry.ensure_fresh(client)
+        on_token = sink._push if run.stream else None
+        keep_alive = run.plan.keep_alive.get(model_name)
+        tried = []
+        attempt = 0
+        while True:
+            try:
+                backend = registry.choose(model_name, exclude=tried)
+            except backends.NoBackendAvailable as e:
+                if not tried:
+                    return error_result(model_name, e, run.elapsed(), type(e).__name__)
+                if attempt >= self.retries:
+                    hosts = ", ".join(b.url for b in tried)
+                    message = f"Could not reach an Ollama host for {model_name} ({hosts}); last error: {tried[-1].error}"
+                    result = error_result(model_name, message, run.elapsed(), BackendUnavailable.__name__)
+                    if attempt:
+                        result["retries"] = attempt
+                    return result
+                tried = []
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+                span.retries += 1
+                continue
+            span.host = backend.url
+            backend.outstanding += 1
+            try:
+                result = await query_ollama_model(
+                    client, model_name, run.prompt, on_token, keep_alive, run.options, backend.url,
+                    context=(run.contexts or {}).get(model_name), keep_context=run.contexts is not None, span=span,
+                )
+            except BackendUnavailable as e:
+                registry.mark_failed(backend, e)
+                span.failovers += 1
+                tried.append(backend)
+                continue
+            except TransientError as e:
+                if attempt >= self.retries:
+                    result = error_result(model_name, e.error, e.duration, type(e.error).__name__)
+                else:
+                    result = None
+            finally:
+                backend.outstanding -= 1
+            if result is None:
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+                span.retries += 1
+                sink._reset(model_name)
+                continue
+            result["host"] = backend.url
+            if attempt:
+                result["retries"] = attempt
+            return result
+
+    async def _follow(self, flight, run, deadline):
+        """Wait for the result of an identical request in flight; None if its leader gave up on it."""
+        flight.join(run)
+        try:
+            waiter = asyncio.shield(flight.future)
+            result = await (asyncio.wait_for(waiter, deadline) if deadline else waiter)
+        except asyncio.CancelledError:
+            if flight.future.cancelled():
+                return None
+            raise
+        finally:
+            flight.leave(run)
+        return {**result, "coalesced": True}
+
+    async def _run_model(self, run, gate, model_name, deadline, cache_key=None, key=None):
+        span = telemetry.get_telemetry().span(run.run_id, model_name)
+        result = None
+        status = None
+        flight = None
+        try:
+            # Joining a request that is already running doesn't need to wait for this run's wave.
+            if key not in self._flights:
+                await gate.wait(model_name)
+            span.mark("scheduled")
+            while key in self._flights:
+                try:
+                    result = await self._follow(self._flights[key], run, deadline)
+                except asyncio.TimeoutError:
+                    status = "timeout"
+                    result = error_result(model_name, f"deadline of {deadline}s exceeded", run.elapsed(), "DeadlineExceeded")
+                    return result
+                if result is not None:
+                    status = "coalesced"
+                    return result
+                run._reset(model_name)
+            if key is not None:
+                flight = self._flights[key] = _Flight(run, model_name)
+            client = await self._get_client()
+            async with self._semaphore:
+                span.mark("dispatched")
+                coro = self._dispatch(client, run, model_name, span, flight)
+                if not deadline:
+                    result = await coro
+                else:
+                    try:
+                        result = await asyncio.wait_for(coro, deadline)
+                    except asyncio.TimeoutError:
+                        status = "timeout"
+                        result = error_result(model_name, f"deadline of {deadline}s exceeded", run.elapsed(), "DeadlineExceeded")
+                        return result
+            if cache_key and not result["response"].startswith("Error:"):
+                response_cache.get_cache().put(cache_key, result)
+            return result
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        finally:
+            if flight is not None:
+                del self._flights[key]
+                # Followers have their own deadline and can be stopped on their own,
+                # so they only take a finished result; otherwise one of them re-sends the request.
+                if status is None and result is not None:
+                    flight.future.set_result(result)
+                else:
+                    flight.future.cancel()
+            gate.finished(model_name)
+            span.finish(result, status)
+
+    def submit(self, prompt, models, stream=True, deadline=None, policy=None, options=None, use_cache=False, bypass_cache=False, contexts=None):
+        """Dispatch ``prompt`` to ``models`` and return a ``Run``.
+
+        Pass ``contexts`` (``{model: context}``, empty for a first turn) to
+        continue per-model conversations; results then carry the new context.
+        """
+        loop = self._ensure_loop()
+        models = list(dict.fromkeys(models))
+
+        state = None
+        cache_keys = {}
+        cached = {}
+        # The cache key doesn't cover conversation context, so conversation turns always go to the model.
+        if use_cache and contexts is None and response_cache.is_deterministic(options):
+            cache = response_cache.get_cache()
+            state = scheduler.load_state()
+            for model_name in models:
+                digest = state["digests"].get(model_name)
+                if digest is None:
+                    continue
+                cache_keys[model_name] = response_cache.make_key(digest, prompt, options)
+                hit = None if bypass_cache else cache.get(cache_keys[model_name])
+                if hit is not None:
+                    cached[model_name] = {**hit, "cached": True}
+                    telemetry.get_telemetry().record_cache_hit(model_name)
+
+        pending = [model_name for model_name in models if model_name not in cached]
+        run = Run(prompt, models, stream, scheduler.plan(pending, state=state, policy=policy), options, contexts)
+        for model_name, result in cached.items():
+            future = concurrent.futures.Future()
+            future.set_result(result)
+            run.futures[model_name] = future
+            run.partial[model_name].append(result["response"])
+            run.partial_reasoning[model_name].append(result.get("reasoning", ""))
+
+        # Regenerate asks for a fresh answer and conversation turns depend on their context, so neither is shared.
+        coalesce = self.coalesce and contexts is None and not bypass_cache
+        gate = _WaveGate(run)
+        for model_name in pending:
+            key = flight_key(model_name, prompt, options) if coalesce else None
+            run.futures[model_name] = asyncio.run_coroutine_threadsafe(
+                self._run_model(run, gate, model_name, deadline, cache_keys.get(model_name), key), loop
+            )
+        return run
+
+    def submit_matrix(self, prompts, models, max_prompts=2, **submit_kwargs):
+        """Dispatch every prompt to ``models`` with at most ``max_prompts`` prompts in flight; returns a ``MatrixRun``."""
+        return MatrixRun(self, prompts, models, max_prompts, submit_kwargs)
+
+    async def _preload(self, model_name, keep_alive):
+        client = await self._get_client()
+        # A request without a prompt only loads (or, with keep_alive 0, unloads) the model.
+        payload = {"model": model_name}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        registry = backends.get_registry()
+        try:
+            await registry.ensure_fresh(client)
+            if keep_alive == 0:
+                # The cached /api/ps may predate a run that loaded the model, so unload it
+                # everywhere it could be; for a host that hasn't loaded it this is a no-op.
+                targets = registry.hosts_with(model_name)
+            else:
+                targets = [registry.choose(model_name)]
+            for backend in targets:
+                res = await client.post(ollama_client.url("/api/generate", backend.url), json=payload)
+                res.raise_for_status()
+            return None
+        except Exception as e:
+            return str(e)
+
+    async def _preload_all(self, models, keep_alive):
+        errors = await asyncio.gather(*(self._preload(model_name, keep_alive) for model_name in models))
+        return dict(zip(models, errors))
+
+    def preload(self, models, keep_alive=None):
+        """Load models in parallel; the returned future resolves to ``{model: error or None}``."""
+        models = list(dict.fromkeys(models))
+        return asyncio.run_coroutine_threadsafe(self._preload_all(models, keep_alive), self._ensure_loop())
+
+    def unload(self, models):
+        return self.preload(models, keep_alive=0)
+
+    def run(self, prompt, models, stream=False, deadline=None, policy=None, options=None, use_cache=False):
+        run = self.submit(
+            prompt, models, stream=stream, deadline=deadline, policy=policy, options=options, use_cache=use_cache
+        )
+        run.wait()
+        return run.results()
+
+    def shutdown(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+            self._client = None
+        self._semaphore = None
+        loop.call_soon_threadsafe(loop.stop)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = DispatchEngine()
+        return _engine
@@ -0,0 +1,231 @@
+"""Export comparison history to Parquet or Arrow IPC for offline analysis.
+
+Usage::
+
+    python -m llm_runner.export Horizontal_chat_history.db results.parquet
+    python -m llm_runner.export Horizontal_chat_history.db results.arrow --with-text
+    python -m llm_runner.export Horizontal_chat_history.db results/ --append
+
+Every saved response becomes one row (one per prompt and model) with typed
+columns: ids, time, prompt, model, the status flags and every timing field
+from ``metrics``. ``--with-text`` adds the response and reasoning text. Rows
+are read from the history database and written in record batches of
+``--batch-size``, so large histories never sit in memory at once.
+
+A single file is written to a temporary name and renamed when complete. With
+``--append`` the output is a directory: each run adds a ``part-NNNNN`` file
+holding only the responses saved since the previous run, and
+``_export.json`` remembers where it stopped. Responses that were retried or
+deleted after they were exported keep their exported row.
+
+Needs ``pyarrow`` (``pip install pyarrow``); nothing else in the app does.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from . import history_store
+
+BATCH_SIZE = 10000
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+STATE_FILE = "_export.json"
+
+COLUMNS = [
+    ("entry_id", "int64"),
+    ("response_id", "int64"),
+    ("created_at", "timestamp"),
+    ("prompt", "string"),
+    ("model", "string"),
+    ("conversation_id", "string"),
+    ("group_id", "string"),
+    ("host", "string"),
+    ("failed", "bool"),
+    ("error_type", "string"),
+    ("cached", "bool"),
+    ("coalesced", "bool"),
+    ("retries", "int64"),
+    ("duration", "float64"),
+    ("ttft", "float64"),
+    ("ttfat", "float64"),
+    ("total_duration", "float64"),
+    ("load_duration", "float64"),
+    ("prompt_eval_count", "int64"),
+    ("prompt_eval_duration", "float64"),
+    ("prompt_eval_rate", "float64"),
+    ("eval_count", "int64"),
+    ("eval_duration", "float64"),
+    ("eval_rate", "float64"),
+    ("eval_rate_estimated", "bool"),
+    ("cold_load", "bool"),
+    ("reasoning_tokens", "int64"),
+    ("context_reused", "int64"),
+    ("word_count", "int64"),
+]
+TEXT_COLUMNS = [("response", "string"), ("reasoning", "string")]
+
+_CASTS = {"int64": int, "float64": float, "bool": bool, "string": str}
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise RuntimeError("Exporting needs pyarrow; install it with: pip install pyarrow")
+
+
+def columns(with_text=False):
+    return COLUMNS + TEXT_COLUMNS if with_text else COLUMNS
+
+
+def schema(with_text=False):
+    _require_pyarrow()
+    types = {
+        "int64": pyarrow.int64(), "float64": pyarrow.float64(), "bool": pyarrow.bool_(),
+        "string": pyarrow.string(), "timestamp": pyarrow.timestamp("ms", tz="UTC"),
+    }
+    return pyarrow.schema([(name, types[kind]) for name, kind in columns(with_text)])
+
+
+def to_record(row, with_text=False):
+    """One history row with every column present and cast to its column type (missing values are null)."""
+    record = {}
+    for name, kind in columns(with_text):
+        value = row.get(name)
+        if value is None or (value == "" and kind != "string"):
+            record[name] = None
+        elif kind == "timestamp":
+            record[name] = int(value * 1000)
+        else:
+            record[name] = _CASTS[kind](value)
+    return record
+
+
+def infer_format(path):
+    for fmt, extension in FORMATS.items():
+        if path.endswith(extension):
+            return fmt
+    if path.endswith((".feather", ".ipc")):
+        return "arrow"
+    return "parquet"
+
+
+class _Writer:
+    """A Parquet or Arrow IPC file written one record batch at a time."""
+
+    def __init__(self, path, fmt, table_schema):
+        self.schema = table_schema
+        if fmt == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(path, table_schema, compression="zstd")
+            self._sink = None
+        else:
+            self._sink = pyarrow.OSFile(path, "wb")
+            self._writer = pyarrow.ipc.new_file(self._sink, table_schema)
+
+    def write(self, records):
+        self._writer.write_batch(pyarrow.RecordBatch.from_pylist(records, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+
+def _read_state(directory):
+    path = os.path.join(directory, STATE_FILE)
+    if not os.path.exists(path):
+        return {"last_response_id": 0, "parts": 0}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_state(directory, state):
+    path = os.path.join(directory, STATE_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+def export_history(store, path, fmt=None, append=False, with_text=False, batch_size=BATCH_SIZE):
+    """Write ``store``'s responses to ``path``; returns ``{"rows", "path", "last_response_id"}``.
+
+    With ``append`` only responses newer than the previous export of the
+    directory ``path`` are written, to a new part file (none if there are no
+    new rows).
+    """
+    _require_pyarrow()
+    table_schema = schema(with_text)
+    if append:
+        fmt = fmt or "parquet"
+        os.makedirs(path, exist_ok=True)
+        state = _read_state(path)
+        target = os.path.join(path, f"part-{state['parts'] + 1:05d}{FORMATS[fmt]}")
+    else:
+        fmt = fmt or infer_format(path)
+        state = {"last_response_id": 0, "parts": 0}
+        target = path
+    last_id = state["last_response_id"]
+    rows = 0
+    writer = None
+    tmp_path = target + ".tmp"
+    try:
+        while True:
+            batch = store.rows_after(last_id, batch_size, bodies=with_text)
+            if not batch:
+                break
+            if writer is None:
+                writer = _Writer(tmp_path, fmt, table_schema)
+            writer.write([to_record(row, with_text) for row in batch])
+            rows += len(batch)
+            last_id = batch[-1]["response_id"]
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            os.remove(tmp_path)
+        raise
+    if writer is None and not append:
+        # Nothing to export still produces a valid, empty file.
+        writer = _Writer(tmp_path, fmt, table_schema)
+    if writer is None:
+        return {"rows": 0, "path": None, "last_response_id": last_id}
+    writer.close()
+    os.replace(tmp_path, target)
+    if append:
+        _write_state(path, {"last_response_id": last_id, "parts": state["parts"] + 1})
+    return {"rows": rows, "path": target, "last_response_id": last_id}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export chat history to Parquet or Arrow IPC, one row per prompt and model.")
+    parser.add_argument("history", help="history database (e.g. Horizontal_chat_history.db)")
+    parser.add_argument("output", help="output file, or a directory with --append")
+    parser.add_argument("--format", choices=sorted(FORMATS), default=None, help="default: from the file extension, parquet otherwise")
+    parser.add_argument("--append", action="store_true", help="add a part file with only the responses saved since the last export")
+    parser.add_argument("--with-text", action="store_true", help="include the response and reasoning text")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"rows per record batch (default {BATCH_SIZE})")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.history):
+        parser.error(f"{args.history} does not exist")
+    store = history_store.HistoryStore(args.history)
+    try:
+        summary = export_history(
+            store, args.output, fmt=args.format, append=args.append, with_text=args.with_text, batch_size=args.batch_size
+        )
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    print(f"rows={summary['rows']} path={summary['path'] or '-'} last_response_id={summary['last_response_id']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,796 @@
+"""SQLite-backed chat history shared by both app views.
+
+Replaces rewriting the whole ``*_chat_history.json`` file after every run.
+Each run is one appended row in ``entries`` plus one row per model in
+``responses`` (the result dict is kept as JSON in ``data``). Deleting a
+response only sets a tombstone flag; ``compact`` removes tombstoned rows.
+Turns of a conversation share a ``conversation_id``, the prompts of one
+matrix run share a ``group_id``, and each response's
+Ollama ``context`` (the token ids the server can resume from) is kept out of
+the JSON as a zlib-compressed int32 blob, read only by
+``conversation_contexts``.
+The database runs in WAL mode so readers don't block the writer, and is
+indexed by prompt, model and time.
+
+The response text and any reasoning text are kept out of ``data`` in the
+``bodies`` table, keyed by their SHA-256 so identical outputs are stored once,
+and compressed with zstd (when the ``zstandard`` package is installed) or zlib
+once they are at least ``COMPRESS_MIN_BYTES`` long. Each response row keeps
+the hashes next to its word count and a ``PREVIEW_WORDS`` preview computed
+once when it is stored; ``data`` only keeps the reasoning's length as
+``reasoning_size``. ``entries``, ``get`` and ``find`` return the previews (and
+a ``failed`` flag) without reading the bodies unless asked to with
+``bodies=True``; ``response_body`` and ``response_reasoning`` read one text on
+demand. ``storage_stats``
+reports how much the compression and deduplication save. Older databases are
+converted once on open, and ``compact`` drops bodies nothing refers to.
+
+``search`` finds responses by words in the prompt or response (an FTS5 index,
+or ``LIKE`` where SQLite was built without FTS5) and by model, date,
+duration and tokens/s, which are copied out of the JSON into indexed columns.
+``leaderboard`` and ``model_trend`` read ``model_stats``, per-model daily
+totals with log-spaced histograms of tokens/s and TTFT that are updated in
+the same transaction as every append, retry and delete, so they never rescan
+the history. Their medians are read off the histograms and are accurate to
+about one bucket (19%). Databases from before the index are backfilled once
+on open.
+
+``migrate_json`` imports an existing JSON history file once, the first time
+the database is created next to it.
+"""
+
+import array
+import bisect
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prompt TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    entry_id INTEGER NOT NULL REFERENCES entries(id),
+    position INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    data TEXT NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS bodies (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS model_stats (
+    model TEXT NOT NULL,
+    day TEXT NOT NULL,
+    runs INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    duration_sum REAL NOT NULL DEFAULT 0,
+    eval_rate_hist TEXT NOT NULL DEFAULT '[]',
+    ttft_hist TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (model, day)
+);
+"""
+
+# Contentless: only the index is stored, the text stays in ``responses``.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS response_search USING fts5(
+    prompt, response, content='', tokenize='porter unicode61'
+);
+"""
+# Bump to rebuild the search columns, index and stats of existing databases on open.
+SEARCH_VERSION = "2"
+# Bump to recompute the stored previews and word counts, and re-store the bodies, on open.
+RENDER_VERSION = "3"
+PREVIEW_WORDS = 50
+# Shorter bodies are stored as plain UTF-8; compression wouldn't pay for its header.
+COMPRESS_MIN_BYTES = 256
+ZSTD_LEVEL = 9
+ZLIB_LEVEL = 6
+
+# Columns added after the first release; older databases get them on open.
+ADDED_COLUMNS = {
+    "entries": {"conversation_id": "TEXT", "group_id": "TEXT"},
+    "responses": {
+        "context": "BLOB", "duration": "REAL", "ttft": "REAL",
+        "eval_count": "INTEGER", "eval_rate": "REAL", "failed": "INTEGER",
+        "body": "TEXT", "word_count": "INTEGER", "preview": "TEXT", "body_hash": "TEXT",
+        "reasoning_hash": "TEXT",
+    },
+}
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_entries_prompt ON entries(prompt);
+CREATE INDEX IF NOT EXISTS idx_entries_created_at ON entries(created_at);
+CREATE INDEX IF NOT EXISTS idx_responses_entry ON responses(entry_id, position);
+CREATE INDEX IF NOT EXISTS idx_responses_model ON responses(model);
+CREATE INDEX IF NOT EXISTS idx_entries_conversation ON entries(conversation_id);
+CREATE INDEX IF NOT EXISTS idx_entries_group ON entries(group_id);
+CREATE INDEX IF NOT EXISTS idx_responses_model_rate ON responses(model, eval_rate);
+CREATE INDEX IF NOT EXISTS idx_responses_duration ON responses(duration);
+CREATE INDEX IF NOT EXISTS idx_responses_body ON responses(body_hash);
+"""
+
+# Upper bounds of the stats histograms: quarter-octave steps, the last bucket is open-ended.
+EVAL_RATE_BUCKETS = [0.25 * 2 ** (i / 4) for i in range(57)]
+TTFT_BUCKETS = [0.01 * 2 ** (i / 4) for i in range(67)]
+
+
+def pack_context(tokens):
+    return zlib.compress(array.array("i", tokens).tobytes())
+
+
+def unpack_context(blob):
+    tokens = array.array("i")
+    tokens.frombytes(zlib.decompress(blob))
+    return tokens.tolist()
+
+
+def is_failed(data):
+    return (data.get("response") or "").startswith("Error:")
+
+
+def search_columns(data):
+    """The indexed metric columns of a stored result: duration, ttft, eval_count, eval_rate, failed."""
+    return (data.get("duration"), data.get("ttft"), data.get("eval_count"), data.get("eval_rate"), int(is_failed(data)))
+
+
+def compress_body(text):
+    """``(codec, blob)`` for a response body."""
+    raw = text.encode("utf-8")
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return "raw", raw
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return "zlib", zlib.compress(raw, ZLIB_LEVEL)
+
+
+def decompress_body(codec, blob):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This history was compressed with zstd; install the zstandard package to read it")
+        raw = zstandard.ZstdDecompressor().decompress(blob)
+    elif codec == "zlib":
+        raw = zlib.decompress(blob)
+    else:
+        raw = blob
+    return raw.decode("utf-8")
+
+
+def body_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def render_fields(text):
+    """Word count and preview of a response: its first ``PREVIEW_WORDS`` words, or all of it if shorter."""
+    words = text.split()
+    if len(words) > PREVIEW_WORDS:
+        return len(words), " ".join(words[:PREVIEW_WORDS]) + "..."
+    return len(words), text
+
+
+def split_result(result):
+    """``(data, body, reasoning)``: the JSON-stored part of a result, its response text and its reasoning text.
+
+    ``data`` leaves out the id, context and both texts, and records the
+    reasoning's length as ``reasoning_size``.
+    """
+    data = {key: value for key, value in result.items() if key not in ("id", "context", "response", "reasoning", "reasoning_size")}
+    reasoning = result.get("reasoning") or ""
+    if reasoning:
+        data["reasoning_size"] = len(reasoning)
+    return data, result.get("response", ""), reasoning
+
+
+def day_of(timestamp):
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+
+def fts_query(text):
+    """Every word of ``text`` as a quoted prefix term, so user input can't break the FTS5 syntax."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def empty_stats():
+    return {"runs": 0, "failures": 0, "duration_sum": 0.0, "eval_rate_hist": [], "ttft_hist": []}
+
+
+def stats_add(stats, data, sign=1):
+    """Add one result to a ``model_stats`` row held as a dict, or remove it with ``sign=-1``.
+
+    Failed, cached and coalesced results count as runs but stay out of the
+    tokens/s and TTFT histograms, so a cache hit or a generation shared by
+    several sessions doesn't count the original run twice.
+    """
+    failed = is_failed(data)
+    stats["runs"] += sign
+    stats["failures"] += sign * failed
+    stats["duration_sum"] += sign * (data.get("duration") or 0)
+    if not failed and not data.get("cached") and not data.get("coalesced"):
+        stats["eval_rate_hist"] = _bucket_add(stats["eval_rate_hist"], EVAL_RATE_BUCKETS, data.get("eval_rate"), sign)
+        stats["ttft_hist"] = _bucket_add(stats["ttft_hist"], TTFT_BUCKETS, data.get("ttft"), sign)
+    return stats
+
+
+def _bucket_add(hist, buckets, value, sign):
+    if value is None or value <= 0:
+        return hist
+    hist = hist + [0] * (len(buckets) + 1 - len(hist))
+    hist[bisect.bisect_left(buckets, value)] += sign
+    return hist
+
+
+def _merge(hists):
+    merged = []
+    for hist in hists:
+        merged = merged + [0] * (len(hist) - len(merged))
+        for i, count in enumerate(hist):
+            merged[i] += count
+    return merged
+
+
+def hist_median(hist, buckets):
+    """Median of a histogram, interpolated linearly inside the bucket that holds it."""
+    total = sum(hist)
+    if not total:
+        return None
+    half = total / 2
+    seen = 0
+    for i, count in enumerate(hist):
+        if count and seen + count >= half:
+            low = buckets[i - 1] if i else 0
+            high = buckets[i] if i < len(buckets) else buckets[-1] * 2
+            return round(low + (high - low) * (half - seen) / count, 2)
+        seen += count
+    return None
+
+
+class HistoryStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._add_columns()
+        self._conn.executescript(INDEXES)
+        # For the substring search used without FTS5.
+        self._conn.create_function("response_text", 1, self._get_body)
+        try:
+            self._conn.executescript(SEARCH_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+        if self.get_meta("render_version") != RENDER_VERSION:
+            self._backfill_render()
+        if self.get_meta("search_version") != SEARCH_VERSION:
+            self.rebuild_search()
+
+    def _add_columns(self):
+        with self._conn:
+            for table, columns in ADDED_COLUMNS.items():
+                existing = {row["name"] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                for name, column_type in columns.items():
+                    if name not in existing:
+                        self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _put_body(self, text):
+        """Store a response body once per distinct text and return its hash."""
+        if text is None:
+            return None
+        digest = body_hash(text)
+        if self._conn.execute("SELECT 1 FROM bodies WHERE hash = ?", (digest,)).fetchone() is None:
+            codec, blob = compress_body(text)
+            self._conn.execute(
+                "INSERT INTO bodies (hash, codec, size, data) VALUES (?, ?, ?, ?)", (digest, codec, len(text.encode("utf-8")), blob)
+            )
+        return digest
+
+    def _get_body(self, digest):
+        if digest is None:
+            return None
+        row = self._conn.execute("SELECT codec, data FROM bodies WHERE hash = ?", (digest,)).fetchone()
+        return decompress_body(row["codec"], row["data"]) if row else None
+
+    def _backfill_render(self, batch=500):
+        """Move response and reasoning text out of ``data`` (or the plain ``body`` column) into ``bodies`` and recompute previews."""
+        with self._lock, self._conn:
+            last_id = 0
+            while True:
+                rows = self._conn.execute(
+                    "SELECT id, data, body, body_hash, reasoning_hash FROM responses WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch)
+                ).fetchall()
+                if not rows:
+                    break
+                for row in rows:
+                    data = json.loads(row["data"])
+                    if row["body_hash"] is not None:
+                        body = self._get_body(row["body_hash"]) or ""
+                    elif row["body"] is not None:
+                        body = row["body"]
+                    else:
+                        body = data.pop("response", "")
+                    reasoning_hash = row["reasoning_hash"]
+                    reasoning = data.pop("reasoning", None)
+                    if reasoning:
+                        data["reasoning_size"] = len(reasoning)
+                        reasoning_hash = self._put_body(reasoning)
+                    self._conn.execute(
+                        "UPDATE responses SET data = ?, body = NULL, body_hash = ?, reasoning_hash = ?, word_count = ?, preview = ? WHERE id = ?",
+                        (json.dumps(data), self._put_body(body), reasoning_hash, *render_fields(body), row["id"]),
+                    )
+                last_id = rows[-1]["id"]
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", ("render_version", RENDER_VERSION))
+
+    def _indexed_rows(self, where, params=()):
+        return self._conn.execute(
+            "SELECT r.id, r.entry_id, r.data, r.body_hash, e.prompt, e.created_at, (r.deleted OR e.deleted) AS deleted "
+            f"FROM responses r JOIN entries e ON e.id = r.entry_id WHERE {where}",
+            params,
+        ).fetchall()
+
+    def _indexed_row(self, response_id):
+        rows = self._indexed_rows("r.id = ?", (response_id,))
+        return rows[0] if rows else None
+
+    def _read_stats(self, model, day):
+        row = self._conn.execute(
+            "SELECT runs, failures, duration_sum, eval_rate_hist, ttft_hist FROM model_stats WHERE model = ? AND day = ?", (model, day)
+        ).fetchone()
+        if row is None:
+            return empty_stats()
+        return {
+            "runs": row["runs"], "failures": row["failures"], "duration_sum": row["duration_sum"],
+            "eval_rate_hist": json.loads(row["eval_rate_hist"]), "ttft_hist": json.loads(row["ttft_hist"]),
+        }
+
+    def _write_stats(self, model, day, stats):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO model_stats (model, day, runs, failures, duration_sum, eval_rate_hist, ttft_hist) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (model, day, stats["runs"], stats["failures"], stats["duration_sum"], json.dumps(stats["eval_rate_hist"]), json.dumps(stats["ttft_hist"])),
+        )
+
+    def _index(self, response_id, prompt, data, created_at):
+        """Add a live response to the search index and its model's daily stats."""
+        if self.fts:
+            self._conn.execute(
+                "INSERT INTO response_search (rowid, prompt, response) VALUES (?, ?, ?)",
+                (response_id, prompt, data.get("response", "")),
+            )
+        model, day = data.get("model", ""), day_of(created_at)
+        self._write_stats(model, day, stats_add(self._read_stats(model, day), data))
+
+    def _unindex(self, row):
+        data = {**json.loads(row["data"]), "response": self._get_body(row["body_hash"])}
+        if self.fts:
+            self._conn.execute(
+                "INSERT INTO response_search (response_search, rowid, prompt, response) VALUES ('delete', ?, ?, ?)",
+                (row["id"], row["prompt"], data.get("response", "")),
+            )
+        model, day = data.get("model", ""), day_of(row["created_at"])
+        self._write_stats(model, day, stats_add(self._read_stats(model, day), data, -1))
+
+    def rebuild_search(self):
+        """Refill the metric columns, search index and daily stats from the stored responses."""
+        with self._lock, self._conn:
+            if self.fts:
+                self._conn.execute("INSERT INTO response_search (response_search) VALUES ('delete-all')")
+            self._conn.execute("DELETE FROM model_stats")
+            stats = {}
+            for row in self._indexed_rows("1"):
+                data = {**json.loads(row["data"]), "response": self._get_body(row["body_hash"])}
+                self._conn.execute(
+                    "UPDATE responses SET duration = ?, ttft = ?, eval_count = ?, eval_rate = ?, failed = ? WHERE id = ?",
+                    (*search_columns(data), row["id"]),
+                )
+                if row["deleted"]:
+                    continue
+                if self.fts:
+                    self._conn.execute(
+                        "INSERT INTO response_search (rowid, prompt, response) VALUES (?, ?, ?)",
+                        (row["id"], row["prompt"], data.get("response", "")),
+                    )
+                key = (data.get("model", ""), day_of(row["created_at"]))
+                stats_add(stats.setdefault(key, empty_stats()), data)
+            for (model, day), day_stats in stats.items():
+                self._write_stats(model, day, day_stats)
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", ("search_version", SEARCH_VERSION))
+
+    def _insert(self, prompt, responses, created_at, conversation_id=None, group_id=None):
+        cur = self._conn.execute(
+            "INSERT INTO entries (prompt, created_at, conversation_id, group_id) VALUES (?, ?, ?, ?)",
+            (prompt, created_at, conversation_id, group_id),
+        )
+        entry_id = cur.lastrowid
+        stored = []
+        for position, res in enumerate(responses):
+            data, body, reasoning = split_result(res)
+            context = res.get("context")
+            cur = self._conn.execute(
+                "INSERT INTO responses (entry_id, position, model, data, context, duration, ttft, eval_count, eval_rate, failed, "
+                "body_hash, reasoning_hash, word_count, preview) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (entry_id, position, data.get("model", ""), json.dumps(data), pack_context(context) if context else None,
+                 *search_columns(res), self._put_body(body), self._put_body(reasoning or None), *render_fields(body)),
+            )
+            self._index(cur.lastrowid, prompt, res, created_at)
+            stored.append({**data, "response": body, "reasoning": reasoning, "id": cur.lastrowid})
+        return {
+            "id": entry_id, "prompt": prompt, "created_at": created_at,
+            "conversation_id": conversation_id, "group_id": group_id, "responses": stored,
+        }
+
+    def append(self, prompt, responses, created_at=None, conversation_id=None):
+        """Store one prompt with its model responses and return it as an entry dict."""
+        created_at = time.time() if created_at is None else created_at
+        with self._lock, self._conn:
+            return self._insert(prompt, responses, created_at, conversation_id)
+
+    def append_group(self, items, group_id, created_at=None):
+        """Store ``(prompt, responses)`` pairs from one matrix run in a single transaction."""
+        created_at = time.time() if created_at is None else created_at
+        with self._lock, self._conn:
+            return [self._insert(prompt, responses, created_at, group_id=group_id) for prompt, responses in items]
+
+    def conversation_contexts(self, conversation_id, before=None):
+        """Latest stored context per model in a conversation, optionally only from entries before ``before``."""
+        sql = (
+            "SELECT r.model, r.context FROM responses r JOIN entries e ON e.id = r.entry_id "
+            "WHERE e.conversation_id = ? AND e.deleted = 0 AND r.deleted = 0 AND r.context IS NOT NULL"
+        )
+        params = [conversation_id]
+        if before is not None:
+            sql += " AND e.id < ?"
+            params.append(before)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY r.id", params).fetchall()
+        return {row["model"]: unpack_context(row["context"]) for row in rows}
+
+    def update_response(self, response_id, result):
+        """Replace a stored response with a new result (a retry) and return it with its id."""
+        data, body, reasoning = split_result(result)
+        context = result.get("context")
+        with self._lock, self._conn:
+            row = self._indexed_row(response_id)
+            if row is None:
+                return None
+            if not row["deleted"]:
+                self._unindex(row)
+            self._conn.execute(
+                "UPDATE responses SET model = ?, data = ?, context = ?, duration = ?, ttft = ?, eval_count = ?, eval_rate = ?, failed = ?, "
+                "body_hash = ?, reasoning_hash = ?, word_count = ?, preview = ? WHERE id = ?",
+                (data.get("model", ""), json.dumps(data), pack_context(context) if context else None, *search_columns(result),
+                 self._put_body(body), self._put_body(reasoning or None), *render_fields(body), response_id),
+            )
+            if not row["deleted"]:
+                self._index(response_id, row["prompt"], result, row["created_at"])
+        return {**data, "response": body, "reasoning": reasoning, "id": response_id}
+
+    def delete_response(self, response_id):
+        """Tombstone one response, and its entry once no responses are left."""
+        with self._lock, self._conn:
+            row = self._indexed_row(response_id)
+            if row is None or row["deleted"]:
+                return
+            self._unindex(row)
+            self._conn.execute("UPDATE responses SET deleted = 1 WHERE id = ?", (response_id,))
+            remaining = self._conn.execute(
+                "SELECT COUNT(*) FROM responses WHERE entry_id = ? AND deleted = 0", (row["entry_id"],)
+            ).fetchone()[0]
+            if not remaining:
+                self._conn.execute("UPDATE entries SET deleted = 1 WHERE id = ?", (row["entry_id"],))
+
+    def delete_entry(self, entry_id):
+        with self._lock, self._conn:
+            for row in self._indexed_rows("r.entry_id = ? AND r.deleted = 0 AND e.deleted = 0", (entry_id,)):
+                self._unindex(row)
+            self._conn.execute("UPDATE responses SET deleted = 1 WHERE entry_id = ?", (entry_id,))
+            self._conn.execute("UPDATE entries SET deleted = 1 WHERE id = ?", (entry_id,))
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries WHERE deleted = 0").fetchone()[0]
+
+    def response_body(self, response_id):
+        """The full text of one stored response, or None if there is no such response."""
+        with self._lock:
+            row = self._conn.execute("SELECT body_hash FROM responses WHERE id = ?", (response_id,)).fetchone()
+            return self._get_body(row["body_hash"]) if row else None
+
+    def response_reasoning(self, response_id):
+        """The reasoning text of one stored response ("" if it had none), or None if there is no such response."""
+        with self._lock:
+            row = self._conn.execute("SELECT reasoning_hash FROM responses WHERE id = ?", (response_id,)).fetchone()
+            return (self._get_body(row["reasoning_hash"]) or "") if row else None
+
+    def storage_stats(self):
+        """Response and reasoning text size before and after compression and deduplication, over live responses.
+
+        ``reclaimable_bytes`` is what bodies no live response refers to (left by
+        deletes and retries) take up until ``compact``.
+        """
+        live_hashes = (
+            "SELECT body_hash FROM responses WHERE deleted = 0 AND body_hash IS NOT NULL "
+            "UNION SELECT reasoning_hash FROM responses WHERE deleted = 0 AND reasoning_hash IS NOT NULL"
+        )
+        with self._lock:
+            responses = self._conn.execute("SELECT COUNT(*) FROM responses WHERE deleted = 0").fetchone()[0]
+            text_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(b.size), 0) FROM responses r JOIN bodies b ON b.hash IN (r.body_hash, r.reasoning_hash) "
+                "WHERE r.deleted = 0"
+            ).fetchone()[0]
+            bodies, stored_bytes = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM bodies WHERE hash IN ({live_hashes})"
+            ).fetchone()
+            total_bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM bodies").fetchone()[0]
+        return {
+            "responses": responses,
+            "bodies": bodies,
+            "text_bytes": text_bytes,
+            "stored_bytes": stored_bytes,
+            "reclaimable_bytes": total_bytes - stored_bytes,
+            "saved_ratio": round(1 - stored_bytes / text_bytes, 3) if text_bytes else 0,
+            "codec": "zstd" if zstandard is not None else "zlib",
+        }
+
+    def _load(self, entry_rows, bodies=False):
+        entries = {
+            row["id"]: {
+                "id": row["id"], "prompt": row["prompt"], "created_at": row["created_at"],
+                "conversation_id": row["conversation_id"], "group_id": row["group_id"], "responses": [],
+            }
+            for row in entry_rows
+        }
+        if not entries:
+            return []
+        ids = list(entries)
+        placeholders = ",".join("?" * len(ids))
+        rows = self._conn.execute(
+            "SELECT id, entry_id, data, word_count, preview, failed, body_hash, reasoning_hash FROM responses "
+            f"WHERE deleted = 0 AND entry_id IN ({placeholders}) ORDER BY entry_id, position",
+            ids,
+        )
+        for row in rows:
+            res = {
+                **json.loads(row["data"]), "id": row["id"],
+                "word_count": row["word_count"], "preview": row["preview"], "failed": bool(row["failed"]),
+            }
+            if bodies:
+                res["response"] = self._get_body(row["body_hash"])
+                res["reasoning"] = self._get_body(row["reasoning_hash"]) or ""
+            entries[row["entry_id"]]["responses"].append(res)
+        return [entries[entry_id] for entry_id in ids]
+
+    def entries(self, limit=None, offset=0, newest_first=False, bodies=False):
+        order = "DESC" if newest_first else "ASC"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, prompt, created_at, conversation_id, group_id FROM entries WHERE deleted = 0 ORDER BY id {order} LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset),
+            ).fetchall()
+            return self._load(rows, bodies)
+
+    def get(self, entry_id, bodies=False):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, prompt, created_at, conversation_id, group_id FROM entries WHERE id = ? AND deleted = 0", (entry_id,)
+            ).fetchall()
+            loaded = self._load(rows, bodies)
+        return loaded[0] if loaded else None
+
+    def find(self, prompt=None, model=None, since=None, until=None, limit=None, conversation_id=None, group_id=None, bodies=False):
+        """Entries matching an exact prompt, a model, a conversation, a group and/or a created_at range, newest first."""
+        clauses = ["e.deleted = 0"]
+        params = []
+        if group_id is not None:
+            clauses.append("e.group_id = ?")
+            params.append(group_id)
+        if conversation_id is not None:
+            clauses.append("e.conversation_id = ?")
+            params.append(conversation_id)
+        if prompt is not None:
+            clauses.append("e.prompt = ?")
+            params.append(prompt)
+        if model is not None:
+            clauses.append("EXISTS (SELECT 1 FROM responses r WHERE r.entry_id = e.id AND r.model = ? AND r.deleted = 0)")
+            params.append(model)
+        if since is not None:
+            clauses.append("e.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("e.created_at < ?")
+            params.append(until)
+        params.append(-1 if limit is None else limit)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT e.id, e.prompt, e.created_at, e.conversation_id, e.group_id FROM entries e WHERE {' AND '.join(clauses)} ORDER BY e.id DESC LIMIT ?",
+                params,
+            ).fetchall()
+            return self._load(rows, bodies)
+
+    def search(self, text=None, models=None, since=None, until=None, min_duration=None, max_duration=None,
+               min_eval_rate=None, max_eval_rate=None, include_failed=True, limit=50):
+        """Responses whose prompt or text contains every word of ``text``, filtered by metrics.
+
+        Returns one row per response with its prompt and metrics, best text
+        match first when ``text`` is given and newest first otherwise.
+        """
+        clauses = ["r.deleted = 0", "e.deleted = 0"]
+        params = []
+        join = ""
+        order = "r.id DESC"
+        words = fts_query(text or "")
+        if words and self.fts:
+            join = "JOIN response_search s ON s.rowid = r.id"
+            clauses.append("response_search MATCH ?")
+            params.append(words)
+            order = "s.rank, r.id DESC"
+        elif words:
+            for word in re.findall(r"\w+", text):
+                clauses.append("(e.prompt LIKE ? OR response_text(r.body_hash) LIKE ?)")
+                params.extend([f"%{word}%"] * 2)
+        if models:
+            clauses.append(f"r.model IN ({','.join('?' * len(models))})")
+            params.extend(models)
+        for column, op, value in (
+            ("e.created_at", ">=", since), ("e.created_at", "<", until),
+            ("r.duration", ">=", min_duration), ("r.duration", "<=", max_duration),
+            ("r.eval_rate", ">=", min_eval_rate), ("r.eval_rate", "<=", max_eval_rate),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        if not include_failed:
+            clauses.append("r.failed = 0")
+        params.append(-1 if limit is None else limit)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.id, r.entry_id, r.model, r.duration, r.ttft, r.eval_count, r.eval_rate, r.failed, e.prompt, e.created_at "
+                f"FROM responses r JOIN entries e ON e.id = r.entry_id {join} WHERE {' AND '.join(clauses)} ORDER BY {order} LIMIT ?",
+                params,
+            ).fetchall()
+        return [{**dict(row), "failed": bool(row["failed"])} for row in rows]
+
+    def rows_after(self, after_id=0, limit=1000, bodies=False):
+        """Live responses with an id above ``after_id`` as flat rows (entry fields plus the result), oldest first.
+
+        For exporting history in batches: pass the last row's ``response_id`` to get the next batch.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.id, r.entry_id, r.data, r.word_count, r.failed, r.body_hash, r.reasoning_hash, "
+                "e.prompt, e.created_at, e.conversation_id, e.group_id "
+                "FROM responses r JOIN entries e ON e.id = r.entry_id "
+                "WHERE r.id > ? AND r.deleted = 0 AND e.deleted = 0 ORDER BY r.id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+            flat = []
+            for row in rows:
+                item = {
+                    **json.loads(row["data"]),
+                    "response_id": row["id"], "entry_id": row["entry_id"], "prompt": row["prompt"],
+                    "created_at": row["created_at"], "conversation_id": row["conversation_id"], "group_id": row["group_id"],
+                    "word_count": row["word_count"], "failed": bool(row["failed"]),
+                }
+                if bodies:
+                    item["response"] = self._get_body(row["body_hash"])
+                    item["reasoning"] = self._get_body(row["reasoning_hash"]) or ""
+                flat.append(item)
+            return flat
+
+    def _stats_rows(self, models=None, since=None, until=None):
+        clauses = ["1"]
+        params = []
+        if models:
+            clauses.append(f"model IN ({','.join('?' * len(models))})")
+            params.extend(models)
+        if since is not None:
+            clauses.append("day >= ?")
+            params.append(day_of(since))
+        if until is not None:
+            clauses.append("day < ?")
+            params.append(day_of(until))
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT * FROM model_stats WHERE {' AND '.join(clauses)} AND runs > 0 ORDER BY model, day", params
+            ).fetchall()
+
+    @staticmethod
+    def _summary(rows):
+        runs = sum(row["runs"] for row in rows)
+        rate_hist = _merge(json.loads(row["eval_rate_hist"]) for row in rows)
+        ttft_hist = _merge(json.loads(row["ttft_hist"]) for row in rows)
+        return {
+            "runs": runs,
+            "failures": sum(row["failures"] for row in rows),
+            "mean_duration": round(sum(row["duration_sum"] for row in rows) / runs, 2) if runs else None,
+            "median_eval_rate": hist_median(rate_hist, EVAL_RATE_BUCKETS),
+            "median_ttft": hist_median(ttft_hist, TTFT_BUCKETS),
+        }
+
+    def leaderboard(self, models=None, since=None, until=None):
+        """Runs, failures, mean duration and median tokens/s and TTFT per model, fastest first.
+
+        Read from the daily stats, so ``since``/``until`` (timestamps) select whole
+        days: from the day of ``since`` up to, not including, the day of ``until``.
+        """
+        by_model = {}
+        for row in self._stats_rows(models, since, until):
+            by_model.setdefault(row["model"], []).append(row)
+        board = [{"model": model, **self._summary(rows)} for model, rows in by_model.items()]
+        return sorted(board, key=lambda row: -(row["median_eval_rate"] or 0))
+
+    def model_trend(self, model, since=None, until=None):
+        """The leaderboard figures for one model, one row per day."""
+        return [{"day": row["day"], **self._summary([row])} for row in self._stats_rows([model], since, until)]
+
+    def models(self):
+        """Every model with stored responses."""
+        with self._lock:
+            return [row["model"] for row in self._conn.execute("SELECT DISTINCT model FROM model_stats WHERE runs > 0 ORDER BY model")]
+
+    def compact(self):
+        """Drop tombstoned rows and unreferenced bodies, reclaim their space and return how many rows went."""
+        with self._lock:
+            with self._conn:
+                responses = self._conn.execute("DELETE FROM responses WHERE deleted = 1").rowcount
+                entries = self._conn.execute("DELETE FROM entries WHERE deleted = 1").rowcount
+                bodies = self._conn.execute(
+                    "DELETE FROM bodies WHERE hash NOT IN (SELECT body_hash FROM responses WHERE body_hash IS NOT NULL "
+                    "UNION SELECT reasoning_hash FROM responses WHERE reasoning_hash IS NOT NULL)"
+                ).rowcount
+            self._conn.execute("VACUUM")
+        return {"entries": entries, "responses": responses, "bodies": bodies}
+
+    def migrate_json(self, json_path):
+        """Import a legacy JSON history file once; returns the number of entries imported."""
+        if self.get_meta("migrated_from") is not None:
+            return 0
+        history = []
+        if os.path.exists(json_path):
+            with open(json_path, "r", encoding="utf-8") as f:
+                history = json.load(f)
+        created_at = os.path.getmtime(json_path) if history else None
+        with self._lock, self._conn:
+            for entry in history:
+                self._insert(entry.get("prompt", ""), entry.get("responses", []), created_at)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                ("migrated_from", os.path.abspath(json_path) if history else ""),
+            )
+        return len(history)
+
@@ -0,0 +1 @@
+"""Page layouts over ``llm_runner.ui``; each module exposes ``render()``."""
@@ -0,0 +1,72 @@
+"""Prompt, model pickers and settings stacked above the results in the main area."""
+
+import streamlit as st
+
+from .. import ui
+
+CSS = """
+<style>
+.stButton button {
+    padding: 0px 5px !important;
+    min-width: unset !important;
+    font-size: 10px !important;
+    height: 25px !important;
+    line-height: 1 !important;
+    margin-top: 28px !important;
+}
+
+div.stButton button[data-testid*="stButton-primary"] {
+    font-size: 14px !important;
+    height: 35px !important;
+}
+
+div[data-testid="stSelectbox"] > div {
+    margin-right: 0px !important;
+}
+</style>
+"""
+
+
+def render():
+    ui.setup("horizontal", CSS)
+    st.title("Running LLMs in parallel")
+
+    models_info = ui.get_models()
+    if not models_info:
+        st.warning("No models found. Ensure Ollama is running and has models pulled.")
+        st.stop()
+
+    prompt = st.text_area("Prompt", "")
+
+    for i in range(st.session_state.model_count):
+        col1, col2 = st.columns([0.97, 0.02])
+        with col1:
+            ui.show_model_select(i, models_info)
+        with col2:
+            st.button("✖", key=f"remove_model_{i}", on_click=ui.remove_model, args=(i,))
+
+    _, col_add, col_regenerate, col_run = st.columns([0.55, 0.15, 0.15, 0.15])
+    with col_add:
+        st.button("Add New Model", on_click=ui.add_model)
+    with col_regenerate:
+        regenerate_clicked = st.button("Regenerate")
+    with col_run:
+        run_clicked = st.button("Run Models", type="primary")
+
+    ui.show_run_settings(inline=True)
+    ui.show_generation_options()
+    ui.show_conversation_controls()
+    ui.show_matrix_controls(prompt, ui.selected_models())
+    ui.show_residency_controls(ui.selected_models())
+
+    if run_clicked:
+        ui.run_prompt(prompt)
+    if regenerate_clicked:
+        ui.regenerate_last_prompt()
+    ui.show_active_work()
+
+    st.markdown("---")
+    st.subheader("Previous Interactions")
+    ui.show_search()
+    page_size = ui.show_page_size_select()
+    ui.show_history(page_size, "No previous interactions found. Run models to start saving history!")
@@ -0,0 +1,81 @@
+"""Prompt, model pickers and settings in the sidebar, results in the main area."""
+
+import streamlit as st
+
+from .. import ui
+
+CSS = """
+<style>
+.stButton button {
+    padding: 0px 5px !important;
+    min-width: unset !important;
+    font-size: 10px !important;
+    height: 20px !important;
+    line-height: 1 !important;
+    margin-top: 28px !important;
+    float: right !important;
+    margin-left: 5px !important;
+}
+
+div[data-testid="stSelectbox"] {
+    width: 100% !important;
+}
+
+button[data-testid="stButton-primary"] {
+    background-color: #FF0000 !important;
+    color: white !important;
+    border-radius: 8px !important;
+    padding: 10px 20px !important;
+    font-size: 16px !important;
+}
+
+.stColumns > div > div > .stButton {
+    text-align: left !important;
+}
+</style>
+"""
+
+
+def render():
+    ui.setup("vertical", CSS)
+
+    with st.sidebar:
+        st.title("LLM Prompt & Models")
+        prompt = st.text_area("Prompt", key="sidebar_prompt")
+
+        models_info = ui.get_models()
+        if not models_info:
+            st.warning("No models found. Ensure Ollama is running and has models pulled.")
+            st.stop()
+
+        st.button("Add new model", on_click=ui.add_model)
+        for i in range(st.session_state.model_count):
+            cols = st.columns([0.9, 0.1])
+            with cols[0]:
+                ui.show_model_select(i, models_info)
+            with cols[1]:
+                st.button("x", key=f"remove_model_{i}", on_click=ui.remove_model, args=(i,))
+
+        button_cols = st.columns(2)
+        with button_cols[0]:
+            regenerate_clicked = st.button("Regenerate")
+        with button_cols[1]:
+            run_clicked = st.button("Run Models", type="primary")
+        ui.show_run_settings()
+        ui.show_generation_options()
+        ui.show_conversation_controls()
+        ui.show_matrix_controls(prompt, ui.selected_models())
+        ui.show_residency_controls(ui.selected_models())
+        page_size = ui.show_page_size_select()
+
+    st.title("Running LLMs in parallel")
+
+    if run_clicked:
+        ui.run_prompt(prompt)
+    if regenerate_clicked:
+        ui.regenerate_last_prompt()
+    ui.show_active_work()
+
+    st.subheader("Interactions")
+    ui.show_search()
+    ui.show_history(page_size, "Enter a prompt and select models to start an interaction.")
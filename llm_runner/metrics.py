@@ -0,0 +1,71 @@
+"""Performance metrics from Ollama's native timing fields.
+
+``/api/generate`` reports ``load_duration``, ``prompt_eval_count``,
+``prompt_eval_duration``, ``eval_count``, ``eval_duration`` and
+``total_duration`` (nanoseconds) in its final response. ``compute_metrics``
+turns those into seconds and tokens/s so the eval rate measures generation
+only, not model load, prompt processing or network time. The wall-clock rate
+is used only when the server didn't report ``eval_duration``, and is flagged
+with ``eval_rate_estimated``.
+
+A response counts as a cold load when ``load_duration`` exceeds
+``OLLAMA_COLD_LOAD_SECS`` (default 0.5).
+"""
+
+import os
+
+COLD_LOAD_SECS = float(os.environ.get("OLLAMA_COLD_LOAD_SECS", "0.5"))
+
+METRIC_FIELDS = [
+    "duration", "ttft", "total_duration", "load_duration", "prompt_eval_count",
+    "prompt_eval_duration", "prompt_eval_rate", "eval_count", "eval_duration",
+    "eval_rate", "eval_rate_estimated", "cold_load", "ttfat", "reasoning_tokens",
+]
+
+
+def _seconds(nanoseconds):
+    return round(nanoseconds / 1e9, 3) if nanoseconds else None
+
+
+def _rate(count, seconds):
+    return round(count / seconds, 2) if count and seconds else 0
+
+
+def compute_metrics(response_data, duration, ttft=None, token_count=None, ttfat=None, reasoning_tokens=None):
+    """Metrics for one finished generation.
+
+    ``duration``, ``ttft`` and ``ttfat`` (time to the first answer token,
+    after any reasoning) are measured by the client in seconds;
+    ``token_count`` is the number of streamed chunks, used as a fallback
+    when the server doesn't report ``eval_count``. ``reasoning_tokens`` is
+    the number of streamed chunks that were reasoning.
+    """
+    load_duration = _seconds(response_data.get("load_duration"))
+    prompt_eval_count = response_data.get("prompt_eval_count", 0)
+    prompt_eval_duration = _seconds(response_data.get("prompt_eval_duration"))
+    eval_count = response_data.get("eval_count")
+    if eval_count is None:
+        eval_count = token_count or 0
+    eval_duration = _seconds(response_data.get("eval_duration"))
+
+    if eval_duration:
+        eval_rate = _rate(eval_count, eval_duration)
+    else:
+        eval_rate = _rate(eval_count, duration)
+
+    return {
+        "duration": duration,
+        "ttft": ttft,
+        "total_duration": _seconds(response_data.get("total_duration")),
+        "load_duration": load_duration,
+        "prompt_eval_count": prompt_eval_count,
+        "prompt_eval_duration": prompt_eval_duration,
+        "prompt_eval_rate": _rate(prompt_eval_count, prompt_eval_duration),
+        "eval_count": eval_count,
+        "eval_duration": eval_duration,
+        "eval_rate": eval_rate,
+        "eval_rate_estimated": not eval_duration,
+        "cold_load": bool(load_duration and load_duration > COLD_LOAD_SECS),
+        "ttfat": ttfat,
+        "reasoning_tokens": reasoning_tokens,
+    }
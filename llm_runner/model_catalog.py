@@ -0,0 +1,125 @@
+"""Process-wide catalog of the models the Ollama hosts have pulled.
+
+The apps used to fetch ``/api/tags`` once per process through
+``@st.cache_data``, so newly pulled models never appeared and an empty list
+from a failed startup fetch stuck until restart. ``ModelCatalog.get`` returns
+the last known catalog immediately and, once it is older than
+``OLLAMA_CATALOG_TTL`` seconds (default 60), refreshes it on a background
+thread. Only the very first call in a process waits for a fetch. A failed
+refresh keeps the previous catalog and is retried after ``RETRY_INTERVAL``
+seconds. Whenever a model appears, disappears or gets a new digest,
+``version`` is bumped and ``changed`` lists the affected names.
+"""
+
+import os
+import threading
+import time
+
+from . import backends
+
+TTL = float(os.environ.get("OLLAMA_CATALOG_TTL", "60"))
+RETRY_INTERVAL = 5
+FIRST_LOAD_WAIT = 10
+
+
+def describe(tag):
+    """Selector metadata for one ``/api/tags`` entry."""
+    details = tag.get("details") or {}
+    return {
+        "name": tag["name"],
+        "size": tag.get("size", 0),
+        "digest": tag.get("digest"),
+        "family": details.get("family"),
+        "parameter_size": details.get("parameter_size"),
+        "quantization": details.get("quantization_level"),
+        "modified_at": tag.get("modified_at"),
+    }
+
+
+def label(name, info=None):
+    """``"llama3.2:latest · 3.2B · Q4_K_M · 1.9 GB"``, or just the name when nothing is known."""
+    info = info or {}
+    parts = [name]
+    for key in ("parameter_size", "quantization"):
+        if info.get(key):
+            parts.append(info[key])
+    if info.get("size"):
+        parts.append(f"{info['size'] / 1024 ** 3:.1f} GB")
+    return " · ".join(parts)
+
+
+class ModelCatalog:
+    def __init__(self, ttl=TTL, registry=None):
+        self.ttl = ttl
+        self.models = {}
+        self.fetched_at = 0
+        self.error = None
+        self.version = 0
+        self.changed = []
+        self._registry = registry
+        self._failed_at = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._loaded = threading.Event()
+
+    def refresh(self):
+        """Fetch the catalog now (blocking)."""
+        registry = self._registry or backends.get_registry()
+        try:
+            registry.refresh()
+            if not registry.healthy():
+                raise backends.NoBackendAvailable("; ".join(f"{b.url}: {b.error}" for b in registry.backends))
+            models = {name: describe(tag) for name, tag in registry.all_models().items()}
+        except Exception as e:
+            with self._lock:
+                self.error = str(e)
+                self._failed_at = time.time()
+            self._loaded.set()
+            return
+        with self._lock:
+            changed = sorted(
+                name for name in models.keys() | self.models.keys()
+                if name not in models or name not in self.models or models[name]["digest"] != self.models[name]["digest"]
+            )
+            if changed:
+                self.version += 1
+                self.changed = changed
+            self.models = models
+            self.fetched_at = time.time()
+            self.error = None
+        self._loaded.set()
+
+    def stale(self):
+        now = time.time()
+        with self._lock:
+            if self.error is not None and now - self._failed_at < RETRY_INTERVAL:
+                return False
+            return now - self.fetched_at > self.ttl
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self.refresh, name="model-catalog", daemon=True)
+            self._thread.start()
+
+    def get(self, wait=FIRST_LOAD_WAIT):
+        """``{name: info}`` for every known model; starts a background refresh when stale."""
+        if self.stale():
+            self.refresh_in_background()
+        if not self._loaded.is_set():
+            self._loaded.wait(wait)
+        with self._lock:
+            return dict(self.models)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ModelCatalog()
+        return _catalog
@@ -0,0 +1,80 @@
+"""Shared HTTP client for talking to Ollama from both app views.
+
+Model requests go through the dispatch engine's ``httpx.AsyncClient``, built
+from these settings with ``make_async_client`` and capped at
+``OLLAMA_MAX_CONCURRENCY`` connections. The host health checks (``/api/tags``
+and ``/api/ps``) use one pooled ``requests.Session`` so connections are kept
+alive between checks. Every request gets a connect and read timeout.
+
+Settings come from environment variables:
+
+- ``OLLAMA_BASE_URL`` (default ``http://localhost:11434``)
+- ``OLLAMA_HOSTS`` (comma-separated base URLs, default ``OLLAMA_BASE_URL``; see ``backends``)
+- ``OLLAMA_POOL_SIZE`` (default 10, kept-alive connections per host for the health checks)
+- ``OLLAMA_CONNECT_TIMEOUT`` in seconds (default 5)
+- ``OLLAMA_READ_TIMEOUT`` in seconds (default 600, applies between chunks when streaming)
+"""
+
+import os
+import threading
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434").rstrip("/")
+POOL_SIZE = int(os.environ.get("OLLAMA_POOL_SIZE", "10"))
+CONNECT_TIMEOUT = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("OLLAMA_READ_TIMEOUT", "600"))
+HOSTS = [host.strip().rstrip("/") for host in os.environ.get("OLLAMA_HOSTS", "").split(",") if host.strip()] or [BASE_URL]
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the shared session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update({"Content-Type": "application/json"})
+            # One connection pool per host, so checking one host doesn't evict another's pool.
+            adapter = HTTPAdapter(pool_connections=len(HOSTS), pool_maxsize=POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def close():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def url(path, base_url=None):
+    return f"{(base_url or BASE_URL).rstrip('/')}{path}"
+
+
+def timeout():
+    return (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+
+def get(path, base_url=None, **kwargs):
+    kwargs.setdefault("timeout", timeout())
+    return get_session().get(url(path, base_url), **kwargs)
+
+
+def make_async_client(max_connections):
+    """Build an ``httpx.AsyncClient`` for the current settings; it must be used on a single event loop.
+
+    The client has no base URL so one instance (and one connection limit) serves every
+    host in ``backends``.
+    """
+    return httpx.AsyncClient(
+        headers={"Content-Type": "application/json"},
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+    )
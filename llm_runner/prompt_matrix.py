@@ -0,0 +1,56 @@
+"""Expand the prompt box into the prompts of a matrix run.
+
+Prompts are separated by a line containing only ``---``. Variables are given
+one per line as ``name: value 1 | value 2``; every ``{name}`` in a prompt is
+replaced by each value in turn, so a template with two variables of three
+values each becomes nine prompts. Placeholders without a variable and other
+braces are left alone.
+"""
+
+import itertools
+
+SEPARATOR = "---"
+
+
+def split_prompts(text):
+    prompts = []
+    current = []
+    for line in text.splitlines():
+        if line.strip() == SEPARATOR:
+            prompts.append("\n".join(current))
+            current = []
+        else:
+            current.append(line)
+    prompts.append("\n".join(current))
+    return [prompt.strip() for prompt in prompts if prompt.strip()]
+
+
+def parse_variables(text):
+    """``{name: [values]}`` from ``name: a | b`` lines; raises ValueError on a malformed line."""
+    variables = {}
+    for line_number, line in enumerate((text or "").splitlines(), 1):
+        if not line.strip():
+            continue
+        name, sep, values = line.partition(":")
+        if not sep or not name.strip():
+            raise ValueError(f"Line {line_number}: expected 'name: value 1 | value 2'")
+        variables[name.strip()] = [value.strip() for value in values.split("|") if value.strip()]
+    return variables
+
+
+def expand(prompts, variables=None):
+    """Every prompt with every combination of the variables it uses, without duplicates."""
+    variables = variables or {}
+    expanded = []
+    for prompt in prompts:
+        names = [name for name, values in variables.items() if values and f"{{{name}}}" in prompt]
+        for combination in itertools.product(*(variables[name] for name in names)):
+            text = prompt
+            for name, value in zip(names, combination):
+                text = text.replace(f"{{{name}}}", value)
+            expanded.append(text)
+    return list(dict.fromkeys(expanded))
+
+
+def build(text, variables_text=None):
+    return expand(split_prompts(text), parse_variables(variables_text))
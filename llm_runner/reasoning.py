@@ -0,0 +1,51 @@
+"""Separate a reasoning model's ``<think>...</think>`` blocks from its answer.
+
+``ThinkFilter`` is fed the response chunk by chunk as it streams and returns
+``(is_reasoning, text)`` segments, so the answer can be shown as it arrives
+while the reasoning is kept aside. A tag split across two chunks (``"<thi"``
+then ``"nk>"``) is held back until the next chunk decides it; each chunk is
+scanned once, so long reasoning doesn't cost a second pass over the response.
+A block left open when the response ends counts as reasoning.
+"""
+
+OPEN_TAG = "<think>"
+CLOSE_TAG = "</think>"
+
+
+def _partial_tag(text, tag):
+    """Length of the longest suffix of ``text`` that could be the start of ``tag``."""
+    for size in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:size]):
+            return size
+    return 0
+
+
+class ThinkFilter:
+    def __init__(self):
+        self.in_reasoning = False
+        self._pending = ""
+
+    def feed(self, text):
+        text = self._pending + text
+        self._pending = ""
+        segments = []
+        while text:
+            tag = CLOSE_TAG if self.in_reasoning else OPEN_TAG
+            index = text.find(tag)
+            if index < 0:
+                keep = _partial_tag(text, tag)
+                if len(text) > keep:
+                    segments.append((self.in_reasoning, text[:len(text) - keep]))
+                self._pending = text[len(text) - keep:]
+                break
+            if index:
+                segments.append((self.in_reasoning, text[:index]))
+            text = text[index + len(tag):]
+            self.in_reasoning = not self.in_reasoning
+        return segments
+
+    def flush(self):
+        """Segments still held back at the end of the response."""
+        text, self._pending = self._pending, ""
+        return [(self.in_reasoning, text)] if text else []
+
@@ -0,0 +1,118 @@
+"""On-disk cache of model responses for deterministic generation settings.
+
+Entries are keyed by the model's digest from ``/api/tags`` plus the prompt and
+generation options, so pulling a new version of a model automatically misses.
+Only deterministic requests (temperature 0 or a fixed seed) are cached.
+The cache is a small SQLite table; reads bump ``last_access`` and writes evict
+entries older than the age limit, then the least recently used ones until the
+total size is under the byte limit.
+
+Settings: ``OLLAMA_RESPONSE_CACHE`` (database path, default
+``response_cache.db``), ``OLLAMA_RESPONSE_CACHE_MB`` (default 256) and
+``OLLAMA_RESPONSE_CACHE_DAYS`` (default 30).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = os.environ.get("OLLAMA_RESPONSE_CACHE", "response_cache.db")
+MAX_BYTES = int(float(os.environ.get("OLLAMA_RESPONSE_CACHE_MB", "256")) * 1024 * 1024)
+MAX_AGE = float(os.environ.get("OLLAMA_RESPONSE_CACHE_DAYS", "30")) * 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache(last_access);
+CREATE INDEX IF NOT EXISTS idx_cache_created_at ON cache(created_at);
+"""
+
+
+def is_deterministic(options):
+    options = options or {}
+    return options.get("temperature") == 0 or options.get("seed") is not None
+
+
+def make_key(digest, prompt, options):
+    raw = json.dumps([digest, prompt, options or {}], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES, max_age=MAX_AGE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT data, created_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.max_age:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key, result):
+        data = json.dumps(result)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, model, data, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, result.get("model", ""), data, len(data), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM cache WHERE created_at < ?", (now - self.max_age,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", doomed)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
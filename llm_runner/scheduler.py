@@ -0,0 +1,128 @@
+"""Residency-aware ordering of model requests.
+
+Firing every selected model at once makes Ollama swap models in and out of
+memory when they don't all fit. ``plan`` reads what is loaded (``/api/ps``)
+and how big each model is (``/api/tags``) across the hosts in ``backends``
+and splits the models of one run
+into waves that the dispatch engine runs one after another. Policies:
+
+- ``parallel``: one wave with every model (the old behaviour).
+- ``resident_first``: models already in memory go first, then the rest in
+  waves that fit ``max_loaded`` models and the memory budget.
+- ``fit_memory``: like ``resident_first``, but models outside the last wave
+  are sent with ``keep_alive=0`` so they free memory as soon as they finish
+  instead of being evicted while the next wave loads.
+- ``sequential``: one model at a time, resident models first.
+
+Defaults come from ``OLLAMA_SCHEDULER_POLICY`` (``resident_first``),
+``OLLAMA_MEMORY_BUDGET_GB`` (unset = count limit only),
+``OLLAMA_MAX_LOADED_MODELS`` (3, same meaning as the Ollama server setting)
+and ``OLLAMA_KEEP_ALIVE`` (unset = server default).
+"""
+
+import os
+
+from . import backends
+
+POLICIES = ("resident_first", "fit_memory", "sequential", "parallel")
+DEFAULT_POLICY = os.environ.get("OLLAMA_SCHEDULER_POLICY", "resident_first")
+MEMORY_BUDGET = int(float(os.environ.get("OLLAMA_MEMORY_BUDGET_GB", "0")) * 1024 ** 3) or None
+MAX_LOADED_MODELS = int(os.environ.get("OLLAMA_MAX_LOADED_MODELS", "3"))
+
+
+def parse_keep_alive(value):
+    """Ollama accepts durations like ``"30m"`` or a number of seconds (``-1`` keeps the model loaded forever)."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+KEEP_ALIVE = parse_keep_alive(os.environ.get("OLLAMA_KEEP_ALIVE"))
+
+
+class Plan:
+    def __init__(self, waves, keep_alive=None):
+        self.waves = waves
+        self.keep_alive = keep_alive or {}
+        self.wave_of = {model: i for i, wave in enumerate(waves) for model in wave}
+
+
+def fetch_state():
+    """Return ``{"resident": {name: size}, "sizes": {name: size}, "digests": {name: digest}}`` across all hosts.
+
+    Read from the last health check so planning a run doesn't wait on every
+    host; stale hosts are refreshed in the background, and only a registry
+    that was never checked is refreshed first.
+    """
+    registry = backends.get_registry()
+    if not any(backend.checked_at for backend in registry.backends):
+        registry.refresh()
+    elif registry.stale():
+        registry.refresh_in_background()
+    if not registry.healthy():
+        raise backends.NoBackendAvailable("No Ollama host is reachable")
+    return registry.state()
+
+
+def load_state():
+    try:
+        return fetch_state()
+    except Exception:
+        return {"resident": {}, "sizes": {}, "digests": {}}
+
+
+def _pack(models, sizes, max_loaded, memory_budget):
+    waves = []
+    current = []
+    used = 0
+    for model in models:
+        size = sizes.get(model, 0)
+        full = len(current) >= max_loaded or (memory_budget and used + size > memory_budget)
+        if current and full:
+            waves.append(current)
+            current = []
+            used = 0
+        current.append(model)
+        used += size
+    if current:
+        waves.append(current)
+    return waves
+
+
+def plan(models, state=None, policy=None, memory_budget=MEMORY_BUDGET, max_loaded=MAX_LOADED_MODELS, keep_alive=KEEP_ALIVE):
+    policy = policy or DEFAULT_POLICY
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown scheduler policy: {policy}")
+    models = list(dict.fromkeys(models))
+
+    if policy == "parallel" or not models:
+        return Plan([models] if models else [], {model: keep_alive for model in models})
+
+    if state is None:
+        state = load_state()
+    resident = state["resident"]
+    sizes = state["sizes"]
+
+    # Resident models cost nothing to start; among cold ones, smaller models
+    # first packs more of them into each wave.
+    warm = [model for model in models if model in resident]
+    cold = sorted((model for model in models if model not in resident), key=lambda model: sizes.get(model, 0))
+
+    if policy == "sequential":
+        max_loaded = 1
+    waves = _pack(warm + cold, sizes, max(1, max_loaded), memory_budget)
+
+    last_wave = set(waves[-1])
+    model_keep_alive = {}
+    for model in models:
+        if policy == "fit_memory" and len(waves) > 1 and model not in last_wave:
+            model_keep_alive[model] = 0
+        else:
+            model_keep_alive[model] = keep_alive
+    return Plan(waves, model_keep_alive)
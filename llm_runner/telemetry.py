@@ -0,0 +1,271 @@
+"""Per-request tracing and Prometheus-style metrics for model dispatches.
+
+Every model request in the dispatch engine gets a ``Span`` that marks when it
+was submitted, released by the scheduler, given a concurrency slot, got
+response headers, got its first token, finished generating and was returned.
+From those it derives the phases
+
+- ``queue_wait``: submitted until a concurrency slot (scheduler waves + the cap),
+- ``connect``: slot until response headers (connection, model load, prompt eval),
+- ``ttft``: slot until the first token,
+- ``generation``: first token until the last,
+- ``post``: last token until the result is returned,
+- ``network``: client-side request time minus Ollama's own ``total_duration``,
+
+so a slow comparison can be pinned on queueing, Ollama or the network.
+Ollama sends a non-streamed response only once it is complete, so for those
+the first token is placed Ollama's ``eval_duration`` before the last. A
+request that waited for an identical one already in flight finishes with
+status ``coalesced``.
+Finished spans update per-model counters and histograms, are kept in a ring
+buffer for the Telemetry page, and can be exported two ways:
+
+- ``OLLAMA_METRICS_PORT``: serve the metrics at ``http://127.0.0.1:<port>/metrics``
+  in Prometheus text format.
+- ``OLLAMA_TRACE_FILE``: append each span as a JSON line to a rotating file
+  (``OLLAMA_TRACE_FILE_MB`` per file, default 10, with 3 backups).
+"""
+
+import collections
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = int(os.environ.get("OLLAMA_METRICS_PORT", "0")) or None
+TRACE_FILE = os.environ.get("OLLAMA_TRACE_FILE") or None
+TRACE_FILE_MB = float(os.environ.get("OLLAMA_TRACE_FILE_MB", "10"))
+RECENT_SPANS = 1000
+
+PHASES = ("queue_wait", "connect", "ttft", "generation", "post", "network")
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, float("inf"))
+PREFIX = "ollama_compare"
+
+
+def _between(marks, start, end):
+    if start in marks and end in marks:
+        return round(marks[end] - marks[start], 4)
+    return None
+
+
+class Span:
+    """Timeline of one model request; ``mark`` is cheap and safe to call from the event loop."""
+
+    def __init__(self, telemetry, run_id, model):
+        self._telemetry = telemetry
+        self.run_id = run_id
+        self.model = model
+        self.host = None
+        self.failovers = 0
+        self.retries = 0
+        self.marks = {"submitted": time.perf_counter()}
+        self.started_at = time.time()
+
+    def mark(self, name, at=None):
+        """Record when ``name`` happened: now, or at ``at`` (a ``time.perf_counter()`` value)."""
+        self.marks.setdefault(name, time.perf_counter() if at is None else at)
+
+    def phases(self, server_total=None):
+        marks = self.marks
+        phases = {
+            "queue_wait": _between(marks, "submitted", "dispatched"),
+            "connect": _between(marks, "dispatched", "connected"),
+            "ttft": _between(marks, "dispatched", "first_token"),
+            "generation": _between(marks, "first_token", "generated"),
+            "post": _between(marks, "generated", "finished"),
+            "network": None,
+        }
+        request_time = _between(marks, "dispatched", "generated")
+        if request_time is not None and server_total:
+            phases["network"] = round(max(0.0, request_time - server_total), 4)
+        return phases
+
+    def finish(self, result=None, status=None):
+        """Record the span; ``status`` defaults to ``ok`` or ``error`` from the result."""
+        self.mark("finished")
+        result = result or {}
+        if status is None:
+            status = "error" if not result or str(result.get("response", "")).startswith("Error:") else "ok"
+        record = {
+            "time": self.started_at,
+            "run_id": self.run_id,
+            "model": self.model,
+            "host": self.host or result.get("host"),
+            "status": status,
+            "error_type": result.get("error_type"),
+            "failovers": self.failovers,
+            "retries": self.retries,
+            "wave_wait": _between(self.marks, "submitted", "scheduled"),
+            **self.phases(result.get("total_duration")),
+            "total": _between(self.marks, "submitted", "finished"),
+            "server_total": result.get("total_duration"),
+            "load": result.get("load_duration"),
+            "prompt_eval": result.get("prompt_eval_duration"),
+            "eval": result.get("eval_duration"),
+            "eval_count": result.get("eval_count") or 0,
+        }
+        self._telemetry.record(record)
+        return record
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _bound(value):
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+class Telemetry:
+    def __init__(self, trace_file=TRACE_FILE, trace_file_mb=TRACE_FILE_MB, recent=RECENT_SPANS):
+        self._lock = threading.Lock()
+        self.recent = collections.deque(maxlen=recent)
+        self.requests = collections.Counter()
+        self.failovers = collections.Counter()
+        self.retries = collections.Counter()
+        self.cache_hits = collections.Counter()
+        self.tokens = collections.Counter()
+        self.histograms = collections.defaultdict(_Histogram)
+        self.server_url = None
+        self.server_error = None
+        self._server = None
+        self._logger = None
+        if trace_file:
+            self._logger = logging.getLogger(f"{PREFIX}.traces")
+            self._logger.propagate = False
+            self._logger.setLevel(logging.INFO)
+            handler = logging.handlers.RotatingFileHandler(
+                trace_file, maxBytes=int(trace_file_mb * 1024 * 1024), backupCount=3, encoding="utf-8"
+            )
+            self._logger.addHandler(handler)
+
+    def span(self, run_id, model):
+        return Span(self, run_id, model)
+
+    def record(self, record):
+        with self._lock:
+            model = record["model"]
+            self.recent.append(record)
+            self.requests[(model, record["status"])] += 1
+            self.failovers[model] += record["failovers"]
+            self.retries[model] += record["retries"]
+            # A coalesced request reports the tokens another request generated.
+            if record["status"] != "coalesced":
+                self.tokens[model] += record["eval_count"]
+            for phase in PHASES + ("total",):
+                if record.get(phase) is not None:
+                    self.histograms[(model, phase)].observe(record[phase])
+        if self._logger is not None:
+            self._logger.info(json.dumps(record))
+
+    def record_cache_hit(self, model):
+        with self._lock:
+            self.cache_hits[model] += 1
+
+    def spans(self, limit=None):
+        with self._lock:
+            spans = list(self.recent)
+        return spans[-limit:] if limit else spans
+
+    def clear(self):
+        with self._lock:
+            self.recent.clear()
+            self.requests.clear()
+            self.failovers.clear()
+            self.retries.clear()
+            self.cache_hits.clear()
+            self.tokens.clear()
+            self.histograms.clear()
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            lines.append(f"# HELP {PREFIX}_requests_total Model requests by final status.")
+            lines.append(f"# TYPE {PREFIX}_requests_total counter")
+            for (model, status), value in sorted(self.requests.items()):
+                lines.append(f"{PREFIX}_requests_total{{{_labels(model=model, status=status)}}} {value}")
+            for name, counter, help_text in (
+                ("failovers_total", self.failovers, "Requests retried on another host."),
+                ("retries_total", self.retries, "Retries after a transient failure."),
+                ("cache_hits_total", self.cache_hits, "Results served from the response cache."),
+                ("tokens_total", self.tokens, "Generated tokens."),
+            ):
+                lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+                lines.append(f"# TYPE {PREFIX}_{name} counter")
+                for model, value in sorted(counter.items()):
+                    lines.append(f"{PREFIX}_{name}{{{_labels(model=model)}}} {value}")
+            lines.append(f"# HELP {PREFIX}_phase_seconds Time spent in each phase of a model request.")
+            lines.append(f"# TYPE {PREFIX}_phase_seconds histogram")
+            for (model, phase), histogram in sorted(self.histograms.items()):
+                labels = _labels(model=model, phase=phase)
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    lines.append(f"{PREFIX}_phase_seconds_bucket{{{labels},le=\"{_bound(bound)}\"}} {count}")
+                lines.append(f"{PREFIX}_phase_seconds_sum{{{labels}}} {round(histogram.total, 6)}")
+                lines.append(f"{PREFIX}_phase_seconds_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve ``/metrics`` on a background thread; a busy port is reported in ``server_error``."""
+        if self._server is not None:
+            return self.server_url
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            self.server_error = f"Could not serve metrics on {host}:{port}: {e}"
+            return None
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="telemetry-metrics", daemon=True).start()
+        self.server_url = f"http://{host}:{port}/metrics"
+        return self.server_url
+
+
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry():
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            _telemetry = Telemetry()
+            if METRICS_PORT:
+                _telemetry.serve(METRICS_PORT)
+        return _telemetry
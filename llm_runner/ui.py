@@ -0,0 +1,834 @@
+"""Streamlit components shared by the horizontal and vertical layouts.
+
+Everything here renders into whatever container is active when it is called,
+so a layout only decides where things go (main area or sidebar, columns or
+stacked) and the behaviour stays the same in both. ``setup`` must be called
+first on every rerun; it records the layout name, which picks the history
+database.
+"""
+
+import datetime
+import time
+import uuid
+
+import pyperclip
+import streamlit as st
+
+from . import backends
+from . import dispatch_engine
+from . import history_store
+from . import model_catalog
+from . import prompt_matrix
+from . import response_cache
+from . import scheduler
+
+# Each layout keeps its own history so existing databases carry over unchanged.
+HISTORY_FILES = {
+    "horizontal": ("Horizontal_chat_history.db", "Horizontal_chat_history.json"),
+    "vertical": ("Vertical_chat_history.db", "Vertical_chat_history.json"),
+}
+HISTORY_PAGE_SIZES = [5, 10, 25, 50]
+
+
+def setup(layout, css):
+    st.set_page_config(page_title="LLM Comparison", layout="wide")
+    st.markdown(css, unsafe_allow_html=True)
+    st.session_state.layout = layout
+    st.session_state.setdefault("history_page", 0)
+    st.session_state.setdefault("model_count", 2)
+    st.session_state.setdefault("selected_models", [""] * st.session_state.model_count)
+
+
+def get_models():
+    catalog = model_catalog.get_catalog()
+    models = catalog.get()
+    if catalog.error and not models:
+        st.error(f"Could not fetch models from Ollama: {catalog.error}")
+    previous_version = st.session_state.get("catalog_version")
+    if previous_version is not None and previous_version != catalog.version:
+        st.toast(f"Model list updated: {', '.join(catalog.changed)}")
+    st.session_state.catalog_version = catalog.version
+    return models
+
+
+def selected_models():
+    return [model for model in st.session_state.selected_models if model]
+
+
+def add_model():
+    st.session_state.model_count += 1
+    st.session_state.selected_models.append("")
+
+
+def remove_model(index):
+    if st.session_state.model_count > 1:
+        st.session_state.model_count -= 1
+        st.session_state.selected_models.pop(index)
+
+
+def show_model_select(index, models_info):
+    models_available = list(models_info)
+    while index >= len(st.session_state.selected_models):
+        st.session_state.selected_models.append("")
+    current = st.session_state.selected_models[index]
+    st.session_state.selected_models[index] = st.selectbox(
+        f"Model {index + 1}",
+        models_available,
+        index=models_available.index(current) if current in models_available else 0,
+        key=f"model_select_{index}",
+        format_func=lambda name: model_catalog.label(name, models_info.get(name)),
+        on_change=preload_selected_model,
+        args=(f"model_select_{index}",)
+    )
+
+
+@st.cache_resource
+def open_history_store(path, legacy_file):
+    store = history_store.HistoryStore(path)
+    try:
+        store.migrate_json(legacy_file)
+    except Exception as e:
+        st.warning(f"Could not import {legacy_file}: {e}")
+    return store
+
+
+def get_history_store():
+    return open_history_store(*HISTORY_FILES[st.session_state.layout])
+
+
+def load_chat_history(offset, limit):
+    try:
+        store = get_history_store()
+        return store.count(), store.entries(limit=limit, offset=offset, newest_first=True)
+    except Exception as e:
+        st.error(f"Could not load chat history: {e}")
+        return 0, []
+
+
+def save_chat_entry(prompt_text, responses, conversation_id=None):
+    try:
+        get_history_store().append(prompt_text, responses, conversation_id=conversation_id)
+    except Exception as e:
+        st.error(f"Could not save chat history: {e}")
+    st.session_state.history_page = 0
+
+
+def update_stored_responses(response_ids, results):
+    try:
+        store = get_history_store()
+        for model, ids in response_ids.items():
+            for response_id in ids:
+                store.update_response(response_id, results[model])
+    except Exception as e:
+        st.error(f"Could not update chat history: {e}")
+
+
+def load_response_body(response_id):
+    try:
+        return get_history_store().response_body(response_id) or ""
+    except Exception as e:
+        st.error(f"Could not load response: {e}")
+        return ""
+
+
+def copy_stored_response(response_id):
+    copy_to_clipboard(load_response_body(response_id))
+
+
+def delete_model_response(response_id):
+    if response_id is None:
+        return
+    try:
+        get_history_store().delete_response(response_id)
+    except Exception as e:
+        st.error(f"Could not delete response: {e}")
+
+
+def change_history_page(step):
+    st.session_state.history_page = max(0, st.session_state.history_page + step)
+
+
+def show_history_pager(total, page_size, key):
+    page_count = max(1, -(-total // page_size))
+    page = min(st.session_state.history_page, page_count - 1)
+    col_prev, col_info, col_next = st.columns([0.15, 0.7, 0.15])
+    with col_prev:
+        st.button("Newer", key=f"history_newer_{key}", disabled=page == 0, on_click=change_history_page, args=(-1,))
+    with col_info:
+        st.caption(f"Page {page + 1} of {page_count} ({total} interactions)")
+    with col_next:
+        st.button("Older", key=f"history_older_{key}", disabled=page >= page_count - 1, on_click=change_history_page, args=(1,))
+
+
+def show_page_size_select():
+    return st.selectbox("Interactions per page", HISTORY_PAGE_SIZES, index=1, key="history_page_size")
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def storage_stats(layout):
+    """Storage savings of a layout's history; summing every body takes a while, so it's refreshed every 5 minutes."""
+    return open_history_store(*HISTORY_FILES[layout]).storage_stats()
+
+
+def compact_history():
+    try:
+        removed = get_history_store().compact()
+    except Exception as e:
+        st.error(f"Could not compact chat history: {e}")
+        return
+    storage_stats.clear()
+    st.toast(f"Removed {removed['responses']} deleted responses and {removed['bodies']} unused bodies")
+
+
+def show_storage_stats():
+    try:
+        stats = storage_stats(st.session_state.layout)
+    except Exception as e:
+        st.caption(f"Could not read storage stats: {e}")
+        return
+    col_stats, col_compact = st.columns([0.8, 0.2])
+    with col_stats:
+        if stats["text_bytes"]:
+            st.caption(
+                f"Response storage: {stats['stored_bytes'] / (1024 * 1024):.1f} MB for {stats['text_bytes'] / (1024 * 1024):.1f} MB of text "
+                f"({stats['saved_ratio']:.0%} saved, {stats['bodies']} distinct bodies for {stats['responses']} responses, {stats['codec']})"
+                + (f"; {stats['reclaimable_bytes'] / (1024 * 1024):.1f} MB reclaimable by Compact history" if stats["reclaimable_bytes"] else "")
+            )
+    with col_compact:
+        st.button(
+            "Compact history", key="compact_history", on_click=compact_history,
+            help="Permanently remove deleted responses and reclaim their disk space",
+        )
+
+
+def show_history(page_size, empty_message):
+    total_entries, page_entries = load_chat_history(st.session_state.history_page * page_size, page_size)
+    if total_entries and not page_entries:
+        st.session_state.history_page = (total_entries - 1) // page_size
+        st.rerun()
+
+    if page_entries:
+        show_history_pager(total_entries, page_size, "top")
+        for entry in page_entries:
+            show_interaction(entry)
+        show_history_pager(total_entries, page_size, "bottom")
+        show_storage_stats()
+    else:
+        st.info(empty_message)
+
+
+def day_range(dates):
+    """``(since, until)`` timestamps covering the whole days picked in a date range input."""
+    if not dates:
+        return None, None
+    start, end = dates[0], dates[-1]
+    since = datetime.datetime.combine(start, datetime.time()).timestamp()
+    until = datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time()).timestamp()
+    return since, until
+
+
+def show_search():
+    # A checkbox rather than an expander: an expander's body runs on every rerun even when collapsed.
+    if not st.checkbox("Search history", value=False, key="search_open"):
+        return
+    try:
+        store = get_history_store()
+        known_models = store.models()
+    except Exception as e:
+        st.error(f"Could not open chat history: {e}")
+        return
+    query = st.text_input("Words in the prompt or response", key="search_text")
+    col_models, col_dates = st.columns(2)
+    with col_models:
+        models = st.multiselect("Models", known_models, key="search_models")
+    with col_dates:
+        dates = st.date_input("Dates", value=(), key="search_dates")
+    col_min_duration, col_max_duration, col_rate, col_failed = st.columns(4)
+    with col_min_duration:
+        min_duration = st.number_input("Min duration (secs)", min_value=0.0, value=None, key="search_min_duration")
+    with col_max_duration:
+        max_duration = st.number_input("Max duration (secs)", min_value=0.0, value=None, key="search_max_duration")
+    with col_rate:
+        min_eval_rate = st.number_input("Min tokens/s", min_value=0.0, value=None, key="search_min_eval_rate")
+    with col_failed:
+        include_failed = st.checkbox("Include errors", value=True, key="search_include_failed")
+
+    since, until = day_range(dates)
+    # Listing matches scans the history, so it only runs once there is something to search for.
+    filtered = query or models or dates or not include_failed or any(
+        value is not None for value in (min_duration, max_duration, min_eval_rate)
+    )
+    try:
+        matches = store.search(
+            query, models=models, since=since, until=until, min_duration=min_duration,
+            max_duration=max_duration, min_eval_rate=min_eval_rate, include_failed=include_failed, limit=200,
+        ) if filtered else []
+        board = store.leaderboard(models=models, since=since, until=until)
+    except Exception as e:
+        st.error(f"Could not search chat history: {e}")
+        return
+
+    if filtered:
+        st.caption(f"{len(matches)} responses" + (" (first 200)" if len(matches) == 200 else ""))
+    else:
+        st.caption("Enter words or set a filter to list matching responses.")
+    if matches:
+        st.dataframe(
+            [
+                {
+                    "Date": time.strftime("%Y-%m-%d %H:%M", time.localtime(row["created_at"])),
+                    "Model": row["model"],
+                    "Prompt": row["prompt"],
+                    "Duration (s)": row["duration"],
+                    "TTFT (s)": row["ttft"],
+                    "Tokens": row["eval_count"],
+                    "Tokens/s": row["eval_rate"],
+                    "Error": row["failed"],
+                }
+                for row in matches
+            ],
+            hide_index=True,
+        )
+    if board:
+        st.markdown("**Leaderboard**")
+        st.caption("Filtered by the selected models and dates only; it is read from daily totals, not from the matches above.")
+        st.dataframe(
+            [
+                {
+                    "Model": row["model"],
+                    "Runs": row["runs"],
+                    "Errors": row["failures"],
+                    "Median tokens/s": row["median_eval_rate"],
+                    "Median TTFT (s)": row["median_ttft"],
+                    "Mean duration (s)": row["mean_duration"],
+                }
+                for row in board
+            ],
+            hide_index=True,
+        )
+    if models:
+        trend = {}
+        for model in models:
+            for row in store.model_trend(model, since, until):
+                trend.setdefault(row["day"], {})[model] = row["median_eval_rate"]
+        if len(trend) > 1:
+            st.caption("Median tokens/s per day")
+            st.line_chart([{"day": day, **values} for day, values in sorted(trend.items())], x="day")
+
+
+def metric_value(res, key):
+    value = res.get(key)
+    return "-" if value is None else value
+
+
+def metric_box(res):
+    estimated = " (wall clock)" if res.get("eval_rate_estimated") else ""
+    cold = " &nbsp;<b style='color:#cc6600;'>cold load</b>" if res.get("cold_load") else ""
+    reasoning = ""
+    if res.get("reasoning") or res.get("reasoning_size"):
+        reasoning = f"""
+            <b>Time to answer</b>: <span style="color:#3366cc;">{metric_value(res, 'ttfat')} secs</span> &nbsp;
+            <b>Reasoning</b>: <span style="color:green;">{metric_value(res, 'reasoning_tokens')} tokens</span> &nbsp;"""
+    context = ""
+    if res.get("context_reused"):
+        context = f" &nbsp;<b>Context reused</b>: <span style=\"color:green;\">{res['context_reused']} tokens</span>"
+    details = ""
+    if "eval_duration" in res:
+        details = f"""<br>
+            <b>Load</b>: <span style="color:#3366cc;">{metric_value(res, 'load_duration')} secs</span>{cold} &nbsp;
+            <b>Prompt eval</b>: <span style="color:green;">{metric_value(res, 'prompt_eval_count')} tokens in {metric_value(res, 'prompt_eval_duration')} secs @ {metric_value(res, 'prompt_eval_rate')} tokens/s</span>{context} &nbsp;
+            <b>Generation</b>: <span style="color:#3366cc;">{metric_value(res, 'eval_duration')} secs</span> &nbsp;
+            <b>Server total</b>: <span style="color:#3366cc;">{metric_value(res, 'total_duration')} secs</span>"""
+    st.markdown(
+        f"""
+        <div style="background-color:#e6f0ff; padding:10px; border-radius:8px; margin-bottom:10px;">
+            <b>Duration</b>: <span style="color:#3366cc;">{res['duration']} secs</span> &nbsp;
+            <b>TTFT</b>: <span style="color:#3366cc;">{metric_value(res, 'ttft')} secs</span> &nbsp;{reasoning}
+            <b>Eval count</b>: <span style="color:green;">{res['eval_count']} tokens</span> &nbsp;
+            <b>Eval rate</b>: <span style="color:green;">{res['eval_rate']} tokens/s{estimated}</span>{details}
+        </div>
+        """, unsafe_allow_html=True
+    )
+
+
+def model_header(model, index):
+    color = "#3366cc" if index % 2 == 0 else "#cc0000"
+    st.markdown(f"### <span style='color:{color}'>{model}</span>", unsafe_allow_html=True)
+
+
+def new_conversation():
+    st.session_state.conversation_id = uuid.uuid4().hex[:12]
+
+
+def toggle_conversation():
+    if st.session_state.conversation_mode:
+        new_conversation()
+    else:
+        st.session_state.pop("conversation_id", None)
+
+
+def show_conversation_controls():
+    st.checkbox("Conversation mode (each model continues its own thread)", value=False, key="conversation_mode", on_change=toggle_conversation)
+    if st.session_state.conversation_mode:
+        if "conversation_id" not in st.session_state:
+            new_conversation()
+        st.caption(f"Conversation {st.session_state.conversation_id}: follow-up prompts reuse each model's context.")
+        st.button("New conversation", key="new_conversation", on_click=new_conversation)
+
+
+def active_conversation_id():
+    return st.session_state.get("conversation_id") if st.session_state.get("conversation_mode") else None
+
+
+def last_conversation_turn(conversation_id):
+    """The newest saved turn of a conversation, or None."""
+    try:
+        latest = get_history_store().find(conversation_id=conversation_id, limit=1)
+    except Exception as e:
+        st.error(f"Could not load conversation: {e}")
+        return None
+    return latest[0] if latest else None
+
+
+def conversation_contexts(before=None):
+    """Each model's context from the previous turn (or the last turn before entry ``before``), or None outside conversation mode."""
+    conversation_id = active_conversation_id()
+    if not conversation_id:
+        return None
+    try:
+        return get_history_store().conversation_contexts(conversation_id, before=before)
+    except Exception as e:
+        st.error(f"Could not load conversation context: {e}")
+        return {}
+
+
+def reasoning_label(res):
+    tokens = res.get("reasoning_tokens")
+    return f"Reasoning ({tokens} tokens)" if tokens else "Reasoning"
+
+
+def show_reasoning(res, expanded=False):
+    if res.get("reasoning"):
+        with st.expander(reasoning_label(res), expanded=expanded):
+            st.write(res["reasoning"])
+
+
+def load_response_reasoning(response_id):
+    try:
+        return get_history_store().response_reasoning(response_id) or ""
+    except Exception as e:
+        st.error(f"Could not load reasoning: {e}")
+        return ""
+
+
+def show_stored_reasoning(entry_idx, i, res):
+    # Saved reasoning can be the longest text a model produces, so unlike a live
+    # run's it is only read from the store while its checkbox is ticked (an
+    # expander's body would run, and read it, on every rerun).
+    if not res.get("reasoning_size"):
+        return
+    if st.checkbox(f"Show {reasoning_label(res).lower()}", key=f"show_reasoning_entry_{entry_idx}_model_{i}"):
+        with st.container(border=True):
+            st.write(load_response_reasoning(res["id"]))
+
+
+def preload_selected_model(select_key):
+    model = st.session_state.get(select_key)
+    if model and st.session_state.get("auto_preload"):
+        keep_alive = scheduler.parse_keep_alive(st.session_state.get("preload_keep_alive"))
+        dispatch_engine.get_engine().preload([model], keep_alive)
+
+
+def show_preload_errors(errors):
+    failed = {model: error for model, error in errors.items() if error}
+    for model, error in failed.items():
+        st.error(f"{model}: {error}")
+    if not failed:
+        st.toast("Done")
+
+
+def show_residency_controls(models):
+    with st.expander("Model residency"):
+        st.text_input("Keep alive (e.g. 30m, 2h, -1 = forever)", value="30m", key="preload_keep_alive")
+        st.checkbox("Preload models when selected", value=False, key="auto_preload")
+        keep_alive = scheduler.parse_keep_alive(st.session_state.preload_keep_alive)
+        col_warm, col_unload = st.columns(2)
+        with col_warm:
+            warm_clicked = st.button("Warm selected models", key="warm_models", disabled=not models)
+        with col_unload:
+            unload_clicked = st.button("Unload selected models", key="unload_models", disabled=not models)
+        if warm_clicked:
+            with st.spinner("Loading models..."):
+                show_preload_errors(dispatch_engine.get_engine().preload(models, keep_alive).result())
+        if unload_clicked:
+            show_preload_errors(dispatch_engine.get_engine().unload(models).result())
+        if warm_clicked or unload_clicked:
+            model_catalog.get_catalog().refresh()
+
+        st.button("Refresh model list", key="refresh_models", on_click=model_catalog.get_catalog().refresh)
+        # Expander bodies run on every rerun, so this shows the last health check and
+        # refreshes stale hosts in the background instead of calling every host here.
+        registry = backends.get_registry()
+        if registry.stale():
+            model_catalog.get_catalog().refresh_in_background()
+        if len(registry.backends) > 1:
+            st.dataframe(registry.status(), hide_index=True)
+        loaded = registry.loaded_models()
+        if loaded:
+            st.dataframe(
+                [
+                    {
+                        "Model": m["name"],
+                        "Host": m["host"],
+                        "Size (GB)": round(m.get("size", 0) / 1024 ** 3, 2),
+                        "VRAM (GB)": round(m.get("size_vram", 0) / 1024 ** 3, 2),
+                        "Expires": m.get("expires_at", ""),
+                    }
+                    for m in loaded
+                ],
+                hide_index=True,
+            )
+        else:
+            st.caption("No models are loaded.")
+
+
+def copy_to_clipboard(text):
+    try:
+        pyperclip.copy(text)
+        st.toast("Copied to clipboard!")
+    except Exception as e:
+        st.error(f"Could not copy to clipboard: {e}")
+
+
+def generation_options():
+    options = {}
+    if st.session_state.get("gen_temperature") is not None:
+        options["temperature"] = st.session_state.gen_temperature
+    if st.session_state.get("gen_seed") is not None:
+        options["seed"] = int(st.session_state.gen_seed)
+    return options or None
+
+
+def show_generation_options():
+    with st.expander("Generation options"):
+        st.number_input("Temperature (empty = model default)", min_value=0.0, max_value=2.0, value=None, step=0.1, key="gen_temperature")
+        st.number_input("Seed (empty = random)", min_value=0, value=None, step=1, key="gen_seed")
+        st.checkbox("Use response cache (temperature 0 or fixed seed only)", value=True, key="use_response_cache")
+        stats = response_cache.get_cache().stats()
+        st.caption(
+            f"Response cache: {stats['hits']} hits / {stats['misses']} misses, "
+            f"{stats['entries']} entries ({stats['bytes'] / (1024 * 1024):.1f} MB)"
+        )
+        st.button("Clear response cache", key="clear_response_cache", on_click=response_cache.get_cache().clear)
+
+
+def show_run_settings(inline=False):
+    """Streaming, deadline and scheduling inputs, side by side when ``inline``."""
+    cols = st.columns(3) if inline else [st.container()] * 3
+    with cols[0]:
+        st.checkbox("Stream tokens", value=True, key="stream_tokens")
+    with cols[1]:
+        st.number_input("Per-model deadline (secs, 0 = none)", min_value=0, value=0, step=30, key="model_deadline")
+    with cols[2]:
+        st.selectbox(
+            "Scheduling",
+            scheduler.POLICIES,
+            index=scheduler.POLICIES.index(scheduler.DEFAULT_POLICY),
+            key="scheduler_policy"
+        )
+
+
+def start_run(prompt_text, models, regenerate=False, before=None, spinner_text="Generating responses..."):
+    deadline = st.session_state.get("model_deadline") or None
+    contexts = conversation_contexts(before)
+    st.session_state.active_run = dispatch_engine.get_engine().submit(
+        prompt_text, models, stream=st.session_state.get("stream_tokens", True), deadline=deadline,
+        policy=st.session_state.scheduler_policy, options=generation_options(),
+        use_cache=st.session_state.get("use_response_cache", True), bypass_cache=regenerate,
+        contexts=contexts
+    )
+    st.session_state.active_run_conversation = st.session_state.get("conversation_id") if contexts is not None else None
+    st.session_state.active_run_spinner = spinner_text
+    # Every session shares the history, so Regenerate keeps this session's own last prompt.
+    st.session_state.last_prompt = prompt_text
+
+
+def failed_responses(entry):
+    """Response ids of the errored columns of a history entry, by model."""
+    response_ids = {}
+    for res in entry["responses"]:
+        if res.get("failed") and res.get("id") is not None:
+            response_ids.setdefault(res["model"], []).append(res["id"])
+    return response_ids
+
+
+def retry_failed_responses(entry):
+    response_ids = failed_responses(entry)
+    contexts = None
+    if entry.get("conversation_id"):
+        try:
+            contexts = get_history_store().conversation_contexts(entry["conversation_id"], before=entry["id"])
+        except Exception as e:
+            st.error(f"Could not load conversation context: {e}")
+            contexts = {}
+    deadline = st.session_state.get("model_deadline") or None
+    st.session_state.active_run = dispatch_engine.get_engine().submit(
+        entry["prompt"], list(response_ids), stream=st.session_state.get("stream_tokens", True), deadline=deadline,
+        policy=st.session_state.scheduler_policy, options=generation_options(), contexts=contexts
+    )
+    st.session_state.active_run_conversation = None
+    st.session_state.active_run_retry = response_ids
+    st.session_state.active_run_spinner = "Retrying failed models..."
+
+
+def regenerate_last_prompt():
+    conversation_id = active_conversation_id()
+    before = None
+    if conversation_id:
+        # Redo this conversation's last turn, continuing from the turn before it.
+        last_turn = last_conversation_turn(conversation_id)
+        if last_turn is None:
+            st.warning("No previous turn in this conversation to regenerate.")
+            return
+        last_prompt, before = last_turn["prompt"], last_turn["id"]
+    else:
+        last_prompt = st.session_state.get("last_prompt")
+        if last_prompt is None:
+            st.warning("No previous prompt to regenerate.")
+            return
+
+    models = selected_models()
+    if not models:
+        st.warning("Please select at least one model.")
+        return
+
+    start_run(last_prompt, models, regenerate=True, before=before, spinner_text="Regenerating responses...")
+
+
+def run_prompt(prompt_text):
+    """Start a run, or a prompt matrix in matrix mode, for the selected models."""
+    models = selected_models()
+    if not prompt_text.strip():
+        return
+    if not models:
+        st.warning("Please select at least one model.")
+    elif st.session_state.get("matrix_mode"):
+        prompts = matrix_prompts(prompt_text)
+        if prompts:
+            start_matrix(prompts, models)
+    else:
+        start_run(prompt_text, models)
+
+
+def show_active_run():
+    run = st.session_state.active_run
+    st.markdown(f"**Prompt:** {run.prompt}")
+    st.button("Stop All", key=f"stop_all_{run.run_id}", on_click=run.cancel)
+
+    cols = st.columns(len(run.models))
+    live_columns = {}
+    for i, model in enumerate(run.models):
+        with cols[i]:
+            model_header(model, i)
+            st.button("Stop", key=f"stop_{run.run_id}_{i}", on_click=run.cancel, args=(model,))
+            live_columns[model] = {"status": st.empty(), "reasoning": st.empty(), "slot": st.empty(), "shown": 0, "thought": 0}
+
+    with st.spinner(st.session_state.pop("active_run_spinner", "Generating responses...")):
+        while True:
+            finished = run.done()
+            for model, live in live_columns.items():
+                if run.done(model):
+                    live["status"].caption("Finished")
+                elif run.queued(model):
+                    live["status"].caption(f"Queued (wave {run.plan.wave_of[model] + 1} of {len(run.plan.waves)})")
+                elif run.reasoning(model) and not run.text(model).strip():
+                    live["status"].caption(f"Thinking... {run.elapsed():.1f}s")
+                else:
+                    live["status"].caption(f"Running... {run.elapsed():.1f}s")
+                thought = run.reasoning(model)
+                if len(thought) != live["thought"]:
+                    with live["reasoning"].container():
+                        show_reasoning({"reasoning": thought})
+                    live["thought"] = len(thought)
+                text = run.text(model)
+                if len(text) != live["shown"]:
+                    live["slot"].write(text)
+                    live["shown"] = len(text)
+            if finished:
+                break
+            time.sleep(0.1)
+
+        results = run.results()
+        retry = st.session_state.pop("active_run_retry", None)
+        if retry is not None:
+            update_stored_responses(retry, results)
+        else:
+            save_chat_entry(run.prompt, [results[model] for model in run.models], st.session_state.pop("active_run_conversation", None))
+
+    del st.session_state.active_run
+    st.rerun()
+
+
+def show_matrix_controls(prompt_text, models):
+    st.checkbox("Prompt matrix (separate prompts with a line containing ---)", value=False, key="matrix_mode")
+    if st.session_state.matrix_mode:
+        st.text_area("Template variables (one per line, name: value 1 | value 2)", key="matrix_variables", height=80)
+        st.number_input("Prompts in flight", min_value=1, max_value=16, value=2, step=1, key="matrix_concurrency")
+        prompts = matrix_prompts(prompt_text)
+        models = list(dict.fromkeys(models))
+        st.caption(f"{len(prompts)} prompts × {len(models)} models = {len(prompts) * len(models)} requests")
+
+
+def matrix_prompts(prompt_text):
+    try:
+        return prompt_matrix.build(prompt_text, st.session_state.get("matrix_variables"))
+    except ValueError as e:
+        st.error(f"Invalid template variables: {e}")
+        return []
+
+
+def save_matrix_group(items, group_id):
+    try:
+        get_history_store().append_group(items, group_id)
+    except Exception as e:
+        st.error(f"Could not save chat history: {e}")
+    st.session_state.history_page = 0
+
+
+def start_matrix(prompts, models):
+    deadline = st.session_state.get("model_deadline") or None
+    st.session_state.active_matrix = dispatch_engine.get_engine().submit_matrix(
+        prompts, models, max_prompts=int(st.session_state.matrix_concurrency), stream=False, deadline=deadline,
+        policy=st.session_state.scheduler_policy, options=generation_options(),
+        use_cache=st.session_state.get("use_response_cache", True)
+    )
+    st.session_state.active_matrix_group = uuid.uuid4().hex[:12]
+
+
+def matrix_cell(res, word_limit=30):
+    words = res["response"].split()
+    snippet = " ".join(words[:word_limit]) + ("..." if len(words) > word_limit else "")
+    return f"`{res['duration']}s · {res['eval_rate']} tokens/s`\n\n{snippet}"
+
+
+def show_active_matrix():
+    matrix = st.session_state.active_matrix
+    st.markdown(f"**Prompt matrix:** {len(matrix.prompts)} prompts × {len(matrix.models)} models")
+    st.button("Stop All", key=f"stop_matrix_{matrix.run_id}", on_click=matrix.cancel)
+    progress = st.empty()
+    widths = [0.25] + [0.75 / len(matrix.models)] * len(matrix.models)
+    header = st.columns(widths)
+    header[0].markdown("**Prompt**")
+    for col, model in zip(header[1:], matrix.models):
+        col.markdown(f"**{model}**")
+    cells = {}
+    for index, prompt_text in enumerate(matrix.prompts):
+        row = st.columns(widths)
+        row[0].write(prompt_text)
+        for col, model in zip(row[1:], matrix.models):
+            cells[(index, model)] = {"slot": col.empty(), "status": None}
+
+    with st.spinner("Running prompt matrix..."):
+        while True:
+            finished = matrix.done()
+            for (index, model), cell in cells.items():
+                status = matrix.status(index, model)
+                if status == cell["status"]:
+                    continue
+                if status in ("done", "cancelled"):
+                    cell["slot"].markdown(matrix_cell(matrix.result(index, model)))
+                else:
+                    cell["slot"].caption(f"{status.capitalize()}...")
+                cell["status"] = status
+            progress.caption(f"{matrix.completed()} of {len(matrix.prompts)} prompts finished, {matrix.elapsed():.1f}s")
+            if finished:
+                break
+            time.sleep(0.2)
+
+        save_matrix_group(
+            [(prompt_text, matrix.results(index)) for index, prompt_text in enumerate(matrix.prompts)],
+            st.session_state.pop("active_matrix_group", None)
+        )
+
+    del st.session_state.active_matrix
+    st.rerun()
+
+
+def show_active_work():
+    """Render the run or prompt matrix in progress, if any; both end with a rerun."""
+    if "active_run" in st.session_state:
+        show_active_run()
+    if "active_matrix" in st.session_state:
+        show_active_matrix()
+
+
+def show_response(entry_idx, i, res):
+    model_header(res["model"], i)
+    if res.get("cached"):
+        st.caption("Served from response cache")
+    elif res.get("coalesced"):
+        st.caption("Shared with an identical request that was already running")
+    metric_box(res)
+    show_stored_reasoning(entry_idx, i, res)
+
+    # The preview and word count were computed when the response was saved;
+    # the full text is only read from the store once "Read More" is clicked.
+    content_is_longer_than_preview = res["word_count"] > history_store.PREVIEW_WORDS
+
+    read_more_toggle_key = f"read_more_entry_{entry_idx}_model_{i}"
+    if read_more_toggle_key not in st.session_state:
+        st.session_state[read_more_toggle_key] = False
+
+    if content_is_longer_than_preview and st.session_state[read_more_toggle_key]:
+        st.write(load_response_body(res["id"]))
+    else:
+        st.write(res["preview"])
+
+    button_cols = st.columns(3)
+    with button_cols[0]:
+        if content_is_longer_than_preview:
+            if not st.session_state[read_more_toggle_key]:
+                if st.button("Read More", key=f"btn_read_{read_more_toggle_key}"):
+                    st.session_state[read_more_toggle_key] = True
+                    st.rerun()
+            else:
+                if st.button("Show Less", key=f"btn_less_{read_more_toggle_key}"):
+                    st.session_state[read_more_toggle_key] = False
+                    st.rerun()
+    with button_cols[1]:
+        st.button(
+            "Copy Output",
+            key=f"copy_response_{entry_idx}_{i}",
+            on_click=copy_stored_response,
+            args=(res["id"],)
+        )
+    with button_cols[2]:
+        st.button(
+            "Delete This Response",
+            key=f"delete_response_{entry_idx}_{i}",
+            on_click=delete_model_response,
+            args=(res.get("id"),)
+        )
+
+
+def show_interaction(entry):
+    entry_idx = entry["id"]
+    st.markdown(f"**Prompt:** {entry['prompt']}")
+    if entry.get("conversation_id"):
+        st.caption(f"Conversation {entry['conversation_id']}")
+    if entry.get("group_id"):
+        st.caption(f"Matrix group {entry['group_id']}")
+    if failed_responses(entry):
+        st.button(
+            "Retry failed only",
+            key=f"retry_failed_{entry_idx}",
+            on_click=retry_failed_responses,
+            args=(entry,),
+            disabled="active_run" in st.session_state,
+        )
+    if entry["responses"]:
+        cols = st.columns(len(entry["responses"]))
+        for i, res in enumerate(entry["responses"]):
+            with cols[i]:
+                show_response(entry_idx, i, res)
+    st.markdown("---")
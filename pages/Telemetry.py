@@ -0,0 +1,110 @@
+import statistics
+
+import streamlit as st
+
+from llm_runner import telemetry
+
+st.set_page_config(page_title="LLM Comparison - Telemetry", layout="wide")
+
+st.title("Telemetry")
+st.caption(
+    "Timings of every model request made by this app process: queue wait (scheduler waves and the concurrency cap), "
+    "connect (until Ollama sends response headers, including model load), time to first token, generation, "
+    "post-processing, and network (client-side request time minus Ollama's own total). "
+    "Non-streamed requests (prompt matrix, batch runs) get their whole response at once, so their generation "
+    "time is Ollama's own eval duration."
+)
+
+collector = telemetry.get_telemetry()
+if collector.server_url:
+    st.caption(f"Prometheus metrics: {collector.server_url}")
+elif collector.server_error:
+    st.warning(collector.server_error)
+else:
+    st.caption("Set OLLAMA_METRICS_PORT to expose these metrics to Prometheus, or OLLAMA_TRACE_FILE to log every span.")
+
+spans = collector.spans()
+
+col_refresh, col_clear = st.columns([0.1, 0.9])
+with col_refresh:
+    st.button("Refresh")
+with col_clear:
+    st.button("Clear", on_click=collector.clear)
+
+if not spans:
+    st.info("No model requests recorded yet. Run a comparison and come back to this page.")
+    st.stop()
+
+
+def mean(values):
+    values = [value for value in values if value is not None]
+    return round(statistics.fmean(values), 3) if values else None
+
+
+def p95(values):
+    values = sorted(value for value in values if value is not None)
+    return values[max(0, round(0.95 * len(values)) - 1)] if values else None
+
+
+by_model = {}
+for span in spans:
+    by_model.setdefault(span["model"], []).append(span)
+
+st.subheader("Per model")
+summary = []
+for model, model_spans in sorted(by_model.items()):
+    totals = [span["total"] for span in model_spans]
+    summary.append({
+        "Model": model,
+        "Requests": len(model_spans),
+        "Errors": sum(1 for span in model_spans if span["status"] == "error"),
+        "Timeouts": sum(1 for span in model_spans if span["status"] == "timeout"),
+        "Cancelled": sum(1 for span in model_spans if span["status"] == "cancelled"),
+        "Coalesced": sum(1 for span in model_spans if span["status"] == "coalesced"),
+        "Failovers": sum(span["failovers"] for span in model_spans),
+        "Retries": sum(span.get("retries", 0) for span in model_spans),
+        "Cache hits": collector.cache_hits.get(model, 0),
+        "Total p50 (s)": round(statistics.median([t for t in totals if t is not None] or [0]), 3),
+        "Total p95 (s)": p95(totals),
+        **{f"{phase} avg (s)": mean(span[phase] for span in model_spans) for phase in telemetry.PHASES},
+    })
+st.dataframe(summary, hide_index=True)
+
+st.subheader("Where the time goes (average seconds per request)")
+# These phases follow each other; ttft and network overlap them, so they aren't stacked.
+chart_phases = ["queue_wait", "connect", "generation", "post"]
+st.bar_chart(
+    [{"model": row["Model"], **{phase: row[f"{phase} avg (s)"] or 0 for phase in chart_phases}} for row in summary],
+    x="model",
+    y=chart_phases,
+    horizontal=True,
+)
+
+st.subheader("Recent requests")
+st.dataframe(
+    [
+        {
+            "Run": span["run_id"],
+            "Model": span["model"],
+            "Host": span["host"],
+            "Status": span["status"],
+            "Error": span["error_type"],
+            "Total": span["total"],
+            "Queue": span["queue_wait"],
+            "Connect": span["connect"],
+            "TTFT": span["ttft"],
+            "Generation": span["generation"],
+            "Post": span["post"],
+            "Network": span["network"],
+            "Server total": span["server_total"],
+            "Load": span["load"],
+            "Failovers": span["failovers"],
+            "Retries": span.get("retries", 0),
+        }
+        for span in reversed(collector.spans(200))
+    ],
+    hide_index=True,
+)
+
+with st.expander("Prometheus metrics"):
+    st.code(collector.render_prometheus(), language="text")